@@ -1,19 +1,17 @@
 import os
 import re
-import json
 import yaml
-import ast
 from copy import deepcopy
-from flask import Flask, render_template, request, redirect, url_for, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, send_from_directory, send_file, session, jsonify
 from flask_session import Session
-from google_auth_oauthlib.flow import Flow
-from google.ads.googleads.client import GoogleAdsClient
-from google.oauth2 import id_token
-from google.auth.transport import requests
 from dotenv import load_dotenv
 
-# your report logic
-from audit.main_runner import generate_google_ads_report
+# your report logic (runs on the background job pool)
+from audit.jobs import submit_report_job, get_job, public_view, JobQueueFull, DONE, FAILED
+from audit.charts import HEATMAP_METRICS, heatmap_dir
+from audit.report_model import INTRO_SECTION, try_parse_to_table, load_structured_report
+from audit import services
+import audit.ads_clients  # registers the ads_client_pool service
 
 # ====== Basic app config ====================================================
 load_dotenv()
@@ -79,6 +77,8 @@ def get_flow(state=None):
     Build a Flow either from client-secrets-web.json (if present)
     or from environment variables.
     """
+    from google_auth_oauthlib.flow import Flow
+
     if os.path.isfile("client-secrets-web.json"):
         if state:
             return Flow.from_client_secrets_file(
@@ -142,19 +142,30 @@ def write_yaml(path, data):
 def normalize_customer_id(cid: str) -> str:
     return re.sub(r"[^0-9]", "", cid or "")
 
-def load_client_with_optional_login(auth_file: str, login_customer_id: str | None):
+def _build_client(auth_file: str, login_customer_id: str | None):
+    # Imported here so app startup (and a preloading master process) never loads gRPC
+    from google.ads.googleads.client import GoogleAdsClient
+
     cfg = read_yaml(auth_file)
     cfg = cfg or {}
     cfg.setdefault("developer_token", base_config.get("developer_token"))
     cfg.setdefault("client_id", base_config.get("client_id"))
     cfg.setdefault("client_secret", base_config.get("client_secret"))
     cfg.setdefault("refresh_token", base_config.get("refresh_token"))
-    cfg.setdefault("use_proto_plus", True) 
+    cfg.setdefault("use_proto_plus", os.getenv("GOOGLE_ADS_USE_PROTO_PLUS", "1") == "1")
     if login_customer_id:
         cfg["login_customer_id"] = normalize_customer_id(login_customer_id)
     return GoogleAdsClient.load_from_dict(cfg)
 
+def load_client_with_optional_login(auth_file: str, login_customer_id: str | None, user: str | None = None):
+    # Returning users get their pooled client back: same gRPC channels, same unexpired
+    # access token. Rebuilt when their YAML changes, dropped after an idle period.
+    return services.get("ads_client_pool").get(
+        user or auth_file, auth_file, normalize_customer_id(login_customer_id) or None, _build_client
+    )
+
 PERSISTED_USERS = load_persisted_users()
+MAX_SESSION_JOBS = 50  # job ids remembered per session (see can_view_job)
 
 # ====== Routes ==============================================================
 
@@ -175,11 +186,17 @@ def index():
         manager_id_override = normalize_customer_id(request.form.get("manager_id", "")) or None
 
         auth_file = authenticated_users[active_user]
-        client = load_client_with_optional_login(auth_file, manager_id_override)
+        client = load_client_with_optional_login(auth_file, manager_id_override, user=active_user)
 
-        filepath = generate_google_ads_report(customer_id, client)
-        session["latest_report"] = filepath
-        return redirect(url_for("report"))
+        try:
+            job = submit_report_job(customer_id, client, owner=active_user)
+        except JobQueueFull as e:
+            return f"⚠️ Too many audits in progress ({e}). Please try again in a few minutes.", 503
+        session["latest_job"] = job["id"]
+        # Coalesced jobs may be owned by another user; remember the ones handed to this session
+        session["my_jobs"] = (session.get("my_jobs", []) + [job["id"]])[-MAX_SESSION_JOBS:]
+        session.pop("latest_report", None)
+        return redirect(url_for("job_page", job_id=job["id"]))
 
     return render_template(
         "index.html",
@@ -212,6 +229,9 @@ def callback():
     flow.fetch_token(authorization_response=request.url)
     credentials = flow.credentials
 
+    from google.oauth2 import id_token
+    from google.auth.transport import requests
+
     try:
         id_info = id_token.verify_oauth2_token(credentials.id_token, requests.Request())
         email = (id_info.get("email") or "").lower()
@@ -251,8 +271,9 @@ def callback():
     # update with new refresh_token
     user_config["refresh_token"] = refresh_token
 
-    # persist user config
+    # persist user config (and drop any pooled client built from the old refresh token)
     write_yaml(user_yaml, user_config)
+    services.get("ads_client_pool").invalidate(email)
 
     # update session & global user list
     session.setdefault("authenticated_users", {})
@@ -275,104 +296,137 @@ def switch_user(identifier):
 
 @app.route("/logout")
 def logout():
+    # Drop the pooled clients (and the refresh tokens they hold) of every user signed in here
+    pool = services.get("ads_client_pool")
+    for email in session.get("authenticated_users", {}):
+        pool.invalidate(email)
     session.clear()
     return redirect(url_for("index"))
 
-@app.route("/report")
-def report():
+def can_view_job(job):
+    """Jobs are only visible to the user who submitted them or a session they were handed to."""
+    return job is not None and (
+        (job.get("owner") is not None and job.get("owner") == session.get("active_user"))
+        or job["id"] in session.get("my_jobs", [])
+    )
+
+def resolve_report_path():
+    """
+    Find the report for this request: ?job=<id> first, then the session's latest job,
+    then a legacy session["latest_report"] path.
+    Returns (filepath, job) where filepath is None if the report is not ready.
+    """
+    job_id = request.args.get("job") or session.get("latest_job")
+    if job_id:
+        job = get_job(job_id)
+        if not can_view_job(job):
+            return None, None
+        if job["status"] == DONE and job.get("result") and os.path.exists(job["result"]):
+            return job["result"], job
+        return None, job
     filepath = session.get("latest_report")
-    if not filepath or not os.path.exists(filepath):
+    if filepath and os.path.exists(filepath):
+        return filepath, None
+    return None, None
+
+def report_not_ready(job):
+    if job is None:
         return "No report found. Please generate again."
-    structured_report = parse_docx_to_structured(filepath)
+    if job["status"] == FAILED:
+        return f"❌ Report generation failed: {job.get('error')}. Please <a href='/'>try again</a>."
+    if job["status"] == DONE:
+        return "Report file is no longer available. Please generate again."
+    return redirect(url_for("job_page", job_id=job["id"]))
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = get_job(job_id)
+    if not can_view_job(job):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(public_view(job))
+
+@app.route("/jobs/<job_id>/result")
+def job_result(job_id):
+    job = get_job(job_id)
+    if not can_view_job(job):
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != DONE:
+        return jsonify(public_view(job)), 202 if job["status"] != FAILED else 500
+    if not job.get("result") or not os.path.exists(job["result"]):
+        return jsonify({"error": "Report file missing"}), 410
+    return send_file(job["result"], as_attachment=True)
+
+@app.route("/jobs/<job_id>/wait")
+def job_page(job_id):
+    job = get_job(job_id)
+    if not can_view_job(job):
+        return "Job not found.", 404
+    if job["status"] == DONE:
+        return redirect(url_for("report", job=job_id))
+    return render_template("job.html", job=public_view(job))
+
+@app.route("/report")
+def report():
+    filepath, job = resolve_report_path()
+    if not filepath:
+        return report_not_ready(job)
+    structured_report = load_structured_report(filepath, fallback=parse_docx_to_structured)
+    download_link = (
+        url_for("job_result", job_id=job["id"]) if job
+        else url_for("download_file", filename=os.path.basename(filepath))
+    )
     return render_template(
         "report.html",
         structured_report=structured_report,
-        download_link=url_for("download_file", filename=os.path.basename(filepath))
+        download_link=download_link,
+        job_id=job["id"] if job else None
     )
 
 @app.route("/download/<filename>")
 def download_file(filename):
+    # Legacy session reports only: never another user's file by name
+    latest = session.get("latest_report")
+    if not latest or os.path.basename(latest) != filename:
+        return "File not found.", 404
     return send_from_directory(app.config["UPLOAD_FOLDER"], filename, as_attachment=True)
 
 @app.route("/section/<section_id>")
 def section_detail(section_id):
-    filepath = session.get("latest_report")
-    if not filepath or not os.path.exists(filepath):
-        return "No report found. Please generate again."
+    filepath, job = resolve_report_path()
+    if not filepath:
+        return report_not_ready(job)
 
+    job_id = job["id"] if job else None
     if section_id == "heatmaps":
-        return render_template("section.html", section={
+        return render_template("section.html", job_id=job_id, section={
             "title": "📊 Heatmaps",
-            "content": [
-                {"type": "image", "metric": "Clicks"},
-                {"type": "image", "metric": "Conversions"},
-                {"type": "image", "metric": "CVR"}
-            ]
+            "content": [{"type": "image", "metric": metric} for metric in HEATMAP_METRICS]
         })
 
     try:
         section_index = int(section_id)
-        structured_report = parse_docx_to_structured(filepath)
+        structured_report = load_structured_report(filepath, fallback=parse_docx_to_structured)
         if section_index < 0 or section_index >= len(structured_report):
             return "Invalid section ID."
         section = structured_report[section_index]
-        return render_template("section.html", section=section)
+        return render_template("section.html", section=section, job_id=job_id)
     except ValueError:
         return "Invalid section ID (not a number)."
 
 @app.route("/report_images/<filename>")
 def report_images(filename):
-    return send_from_directory("report_images", filename)
-
-# ====== Utilities (table/docx parsing) =====================================
-def try_parse_to_table(text):
-    if not text or not isinstance(text, str):
-        return None
-    cleaned = text.strip().replace("“", '"').replace("”", '"')
-    try:
-        data = json.loads(cleaned)
-        if isinstance(data, dict):
-            data = [data]
-        if isinstance(data, list) and all(isinstance(d, dict) for d in data):
-            headers = list(data[0].keys())
-            rows = [[d.get(h, "") for h in headers] for d in data]
-            return {"headers": headers, "rows": rows}
-    except Exception:
-        try:
-            data = ast.literal_eval(cleaned)
-            if isinstance(data, list) and all(isinstance(d, dict) for d in data):
-                headers = list(data[0].keys())
-                rows = [[d.get(h, "") for h in headers] for d in data]
-                return {"headers": headers, "rows": rows}
-        except Exception:
-            pass
-
-    lines = [line.strip("•*- ") for line in cleaned.splitlines() if "|" in line]
-    rows = [line.split("|")[:3] for line in lines if len(line.split("|")) >= 3]
-    if rows:
-        return {"headers": ["Characteristic", "Insight", "Recommendation"], "rows": rows}
-
-    for sep in [",", "\t"]:
-        lines = [line for line in cleaned.splitlines() if sep in line]
-        rows = [line.split(sep)[:3] for line in lines if len(line.split(sep)) >= 3]
-        if rows:
-            return {"headers": ["Characteristic", "Insight", "Recommendation"], "rows": rows}
-    return None
+    # Heatmaps live next to the report they belong to (?job=<id>, else the session's report)
+    filepath, job = resolve_report_path()
+    if not filepath:
+        return "Image not found.", 404
+    return send_from_directory(heatmap_dir(filepath), filename)
 
+# ====== Utilities (docx parsing, for reports saved without a structured model) ==
 def parse_docx_to_structured(path):
     from docx import Document
     doc = Document(path)
     structured = []
-    current_section = {
-        "title": "⭐ Introduction",
-        "content": [{
-            "type": "paragraph",
-            "content": (
-                "Hello, this is a structured report generated from a Google Ads audit document. "
-                "It contains insights, visualizations, and optimization suggestions."
-            )
-        }]
-    }
+    current_section = deepcopy(INTRO_SECTION)
     para_index = 0
     table_index = 0
 
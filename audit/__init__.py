@@ -1,3 +1,9 @@
-from .main_runner import generate_google_ads_report
-
 __all__ = ["generate_google_ads_report"]
+
+
+def __getattr__(name):
+    # Import the pipeline on first use so helpers like audit.ingest load without credentials.
+    if name == "generate_google_ads_report":
+        from .main_runner import generate_google_ads_report
+        return generate_google_ads_report
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,174 @@
+import os
+import time
+import hashlib
+import threading
+from .rate_limit import TokenBucket, backoff_delay
+from .ingest import iter_stream_rows
+
+# === Google Ads Call Config ===
+# Request rates are shared by every report in this process: one bucket per developer
+# token (the API's global quota) and one per customer account.
+ADS_TOKEN_QPS = float(os.getenv("ADS_TOKEN_QPS", "10"))
+ADS_TOKEN_BURST = int(os.getenv("ADS_TOKEN_BURST", "20"))
+ADS_CUSTOMER_QPS = float(os.getenv("ADS_CUSTOMER_QPS", "2"))
+ADS_CUSTOMER_BURST = int(os.getenv("ADS_CUSTOMER_BURST", "5"))
+ADS_MAX_RETRIES = int(os.getenv("ADS_MAX_RETRIES", "5"))
+ADS_CALL_DEADLINE = float(os.getenv("ADS_CALL_DEADLINE", "600"))  # per query, retries and resumes included
+ADS_BACKOFF_BASE = 2.0
+ADS_BACKOFF_CAP = 60.0
+
+# gRPC status codes worth retrying
+RETRYABLE_STATUSES = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "ABORTED"}
+# QuotaError values worth retrying (an exhausted daily quota comes with a retry delay past
+# the deadline, so it still fails at once)
+RETRYABLE_QUOTA_ERRORS = {
+    "RESOURCE_TEMPORARILY_EXHAUSTED",
+    "EXCESSIVE_SHORT_TERM_QUERY_RESOURCE_CONSUMPTION",
+    "RESOURCE_EXHAUSTED",
+}
+
+_lock = threading.Lock()
+_buckets = {}
+_stats = {}
+
+
+def _after_fork_in_child():
+    global _lock
+    _lock = threading.Lock()
+    _buckets.clear()
+    _stats.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _token_label(client):
+    # Developer tokens are secrets: metrics and logs only ever see a short hash
+    token = str(getattr(client, "developer_token", "") or "")
+    return "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:8]
+
+
+def _bucket(key, rate, burst):
+    with _lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate, burst, f"Google Ads rate limit ({key})")
+        return bucket
+
+
+def _count(key, field, amount=1):
+    with _lock:
+        stats = _stats.setdefault(key, {
+            "requests": 0, "rows": 0, "retries": 0, "resumes": 0,
+            "quota_errors": 0, "failures": 0, "throttle_wait": 0.0,
+        })
+        stats[field] += amount
+
+
+def _seconds(duration):
+    if hasattr(duration, "total_seconds"):
+        return duration.total_seconds()  # proto-plus Duration
+    return getattr(duration, "seconds", 0) + getattr(duration, "nanos", 0) / 1e9
+
+
+def classify_error(error):
+    """
+    (retryable, retry_after seconds or None, is_quota_error) for an exception raised
+    by a Google Ads call (GoogleAdsException or a bare gRPC error).
+    """
+    failure = getattr(error, "failure", None)
+    rpc_error = getattr(error, "error", error) if failure is not None else error
+    code = rpc_error.code() if callable(getattr(rpc_error, "code", None)) else None
+    status = getattr(code, "name", "")
+    retryable = status in RETRYABLE_STATUSES
+    retry_after = None
+    quota = status == "RESOURCE_EXHAUSTED"
+    for err in getattr(failure, "errors", None) or []:
+        quota_error = getattr(getattr(err, "error_code", None), "quota_error", 0)
+        if quota_error:
+            quota = True
+            retryable = getattr(quota_error, "name", "") in RETRYABLE_QUOTA_ERRORS
+            delay = getattr(getattr(getattr(err, "details", None), "quota_error_details", None), "retry_delay", None)
+            if delay is not None and _seconds(delay) > 0:
+                retry_after = max(retry_after or 0, _seconds(delay))
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        retryable = True
+    return retryable, retry_after, quota
+
+
+def search_stream_rows(client, customer_id, query, raw=None, deadline=None):
+    """
+    Rows of a GAQL query from GoogleAdsService.search_stream, through the shared
+    per-developer-token and per-customer rate limits.
+    Transient failures (quota / rate errors, UNAVAILABLE, timeouts) are retried with
+    the server's retry delay when it gives one, jittered backoff otherwise. A stream
+    that breaks part-way is re-issued and the rows already yielded are skipped, so
+    callers see every row exactly once (this relies on the API returning a repeated
+    query's rows in the same order, which it does for an unchanged query and account).
+    """
+    deadline = deadline or time.monotonic() + ADS_CALL_DEADLINE
+    token_key = _token_label(client)
+    customer_key = f"customer:{customer_id}"
+    token_bucket = _bucket(token_key, ADS_TOKEN_QPS, ADS_TOKEN_BURST)
+    customer_bucket = _bucket(customer_key, ADS_CUSTOMER_QPS, ADS_CUSTOMER_BURST)
+    service = client.get_service("GoogleAdsService")
+
+    consumed = 0
+    attempt = 0
+    while True:
+        wait_start = time.monotonic()
+        token_bucket.acquire(deadline)
+        customer_bucket.acquire(deadline)
+        waited = time.monotonic() - wait_start
+        for key in (token_key, customer_key):
+            _count(key, "requests")
+            _count(key, "throttle_wait", waited)
+
+        skip = consumed
+        try:
+            response = service.search_stream(customer_id=customer_id, query=query)
+            for row in iter_stream_rows(response, raw):
+                if skip:
+                    skip -= 1
+                    continue
+                consumed += 1
+                yield row
+            for key in (token_key, customer_key):
+                _count(key, "rows", consumed)
+            return
+        except Exception as e:
+            retryable, retry_after, quota = classify_error(e)
+            if quota:
+                for key in (token_key, customer_key):
+                    _count(key, "quota_errors")
+            delay = retry_after if retry_after is not None else backoff_delay(attempt, ADS_BACKOFF_BASE, ADS_BACKOFF_CAP)
+            if not retryable or attempt >= ADS_MAX_RETRIES or time.monotonic() + delay >= deadline:
+                for key in (token_key, customer_key):
+                    _count(key, "failures")
+                raise
+            attempt += 1
+            for key in (token_key, customer_key):
+                _count(key, "retries")
+                if consumed:
+                    _count(key, "resumes")
+            print(f"⚠️ Google Ads call for {customer_id} failed after {consumed} rows ({type(e).__name__}); "
+                  f"retry {attempt}/{ADS_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def has_account_access(client, customer_id):
+    """True if client's credentials can query customer_id (one single-row request)."""
+    try:
+        for _ in search_stream_rows(client, customer_id, "SELECT customer.id FROM customer LIMIT 1"):
+            pass
+        return True
+    except Exception as e:
+        print(f"⚠️ No Google Ads access to {customer_id}: {e}")
+        return False
+
+
+def quota_stats():
+    """Request / row / retry / quota-error counts and throttle wait, per developer token and per customer."""
+    with _lock:
+        return {key: dict(stats) for key, stats in _stats.items()}
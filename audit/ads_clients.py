@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+from . import services
+
+# === Google Ads Client Pool Config ===
+ADS_CLIENT_IDLE_SECONDS = int(os.getenv("ADS_CLIENT_IDLE_SECONDS", "1800"))  # evict clients unused this long
+ADS_CLIENT_MAX = int(os.getenv("ADS_CLIENT_MAX", "64"))                      # ... and beyond this many, LRU first
+
+
+class PooledAdsClient:
+    """
+    A GoogleAdsClient whose service clients are built once and reused, so every query
+    of every audit for the same user / login customer rides the same gRPC channel and
+    the same OAuth credentials (the access token is only refreshed when it expires).
+    Anything else is delegated untouched.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get_service(self, name, version=None, interceptors=None):
+        if interceptors:
+            return self._client.get_service(name, version=version, interceptors=interceptors)
+        key = (name, version)
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                service = self._services[key] = self._client.get_service(name, version=version)
+            return service
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class _Entry:
+    def __init__(self, client, signature):
+        self.client = client
+        self.signature = signature
+        self.last_used = time.monotonic()
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class AdsClientPool:
+    """
+    PooledAdsClients keyed by (user, login_customer_id). An entry is rebuilt when the
+    user's credentials YAML changes (mtime / size) and dropped after
+    ADS_CLIENT_IDLE_SECONDS without use. Dropping only forgets the entry: audits still
+    holding the client keep using it until they finish.
+    """
+
+    def __init__(self, idle_seconds=ADS_CLIENT_IDLE_SECONDS, max_clients=ADS_CLIENT_MAX):
+        self.idle_seconds = idle_seconds
+        self.max_clients = max_clients
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "reloads": 0, "evictions": 0}
+
+    def get(self, user, auth_file, login_customer_id, build):
+        """Pooled client for user, built with build(auth_file, login_customer_id) on a miss."""
+        key = (user, login_customer_id or None)
+        signature = _file_signature(auth_file)
+        with self._lock:
+            self._evict_idle()
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._stats["hits"] += 1
+                entry.last_used = time.monotonic()
+                return entry.client
+            self._stats["reloads" if entry is not None else "misses"] += 1
+            client = PooledAdsClient(build(auth_file, login_customer_id))
+            self._entries[key] = _Entry(client, signature)
+            while len(self._entries) > self.max_clients:
+                oldest = min(self._entries, key=lambda k: self._entries[k].last_used)
+                del self._entries[oldest]
+                self._stats["evictions"] += 1
+            return client
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        for key in [k for k, e in self._entries.items() if e.last_used < cutoff]:
+            del self._entries[key]
+            self._stats["evictions"] += 1
+
+    def invalidate(self, user):
+        """Forget every client of user (e.g. after they re-authenticate or log out)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, clients=len(self._entries))
+
+
+# One pool per process; a forked worker starts with an empty one (see services)
+services.register("ads_client_pool", AdsClientPool)
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from .ingest import concat_columns, encode_columns, decode_columns
+
+# Accumulators consume a query's column chunks (see ingest.iter_column_chunks) and keep
+# a bounded summary. Each one can dump/load itself so gaql_cache can cache the summary
+# instead of the raw rows.
+
+
+class ColumnCollector:
+    """Keeps every row (for entity-level queries such as campaigns)."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.rows_seen = 0
+        self.truncated = False
+        self._chunks = []
+
+    def cache_tag(self):
+        return "columns"
+
+    def add(self, columns):
+        self._chunks.append(columns)
+        self.rows_seen += len(next(iter(columns.values())))
+
+    def result(self):
+        columns = concat_columns(self._chunks, self.schema)
+        self._chunks = [columns]
+        return columns
+
+    def dump(self):
+        return {"rows_seen": self.rows_seen, "truncated": self.truncated, "columns": encode_columns(self.result())}
+
+    def load(self, payload):
+        self.rows_seen = payload["rows_seen"]
+        self.truncated = payload["truncated"]
+        self._chunks = [decode_columns(payload["columns"], self.schema)]
+
+
+class TopKCollector(ColumnCollector):
+    """Keeps only the k rows with the largest sort_field; marks the result truncated if it dropped any."""
+
+    def __init__(self, schema, sort_field, k):
+        super().__init__(schema)
+        self.sort_field = sort_field
+        self.k = k
+
+    def cache_tag(self):
+        return f"topk:{self.sort_field}:{self.k}"
+
+    def add(self, columns):
+        super().add(columns)
+        merged = concat_columns(self._chunks, self.schema)
+        if len(merged[self.sort_field]) > self.k:
+            keep = np.argpartition(-merged[self.sort_field], self.k - 1)[:self.k]
+            merged = {f: values[keep] for f, values in merged.items()}
+            self.truncated = True
+        self._chunks = [merged]
+
+    def result(self):
+        columns = super().result()
+        order = np.argsort(-columns[self.sort_field], kind="stable")
+        return {f: values[order] for f, values in columns.items()}
+
+
+class GroupSum:
+    """
+    Sums value_fields per key (after key_fn, e.g. URL normalization).
+    Memory is bounded by the number of distinct keys, not by the number of rows.
+    """
+
+    def __init__(self, key_field, value_fields, key_fn=None):
+        self.key_field = key_field
+        self.value_fields = list(value_fields)
+        self.key_fn = key_fn
+        self.rows_seen = 0
+        self.truncated = False
+        self._index = {}
+        self._sums = np.zeros((0, len(self.value_fields)), dtype=np.float64)
+
+    def cache_tag(self):
+        name = getattr(self.key_fn, "__name__", "") if self.key_fn else ""
+        return f"groupsum:{self.key_field}:{name}:{','.join(self.value_fields)}"
+
+    def add(self, columns):
+        keys = pd.Series(columns[self.key_field])
+        self.rows_seen += len(keys)
+        if self.key_fn is not None:
+            uniques = keys.unique()
+            keys = keys.map(dict(zip(uniques, map(self.key_fn, uniques))))
+        values = pd.DataFrame({f: columns[f] for f in self.value_fields}, dtype=np.float64)
+        # dropna=False: rows with a missing key are summed under None, not silently dropped
+        chunk = values.groupby(keys.values, sort=False, dropna=False).sum()
+
+        # plain Python scalars, msgpack-friendly (NaN never equals itself, so it can't be a dict key)
+        chunk_keys = [None if pd.isna(k) else k for k in chunk.index.tolist()]
+        new_keys = [k for k in chunk_keys if k not in self._index]
+        if new_keys:
+            for k in new_keys:
+                self._index[k] = len(self._index)
+            self._sums = np.vstack([self._sums, np.zeros((len(new_keys), len(self.value_fields)))])
+        rows = np.fromiter((self._index[k] for k in chunk_keys), dtype=np.int64, count=len(chunk_keys))
+        self._sums[rows] += chunk.to_numpy()
+
+    def result(self):
+        """dict with key_field -> keys and each value field -> summed float64 array."""
+        result = {self.key_field: np.array(list(self._index), dtype=object)}
+        for i, f in enumerate(self.value_fields):
+            result[f] = self._sums[:, i].copy()
+        return result
+
+    def dump(self):
+        return {"rows_seen": self.rows_seen, "keys": list(self._index), "sums": self._sums.tobytes()}
+
+    def load(self, payload):
+        self.rows_seen = payload["rows_seen"]
+        self._index = {k: i for i, k in enumerate(payload["keys"])}
+        self._sums = np.frombuffer(payload["sums"], dtype=np.float64).reshape(
+            len(self._index), len(self.value_fields)
+        ).copy()
+
+
+class HourlyAccumulator:
+    """
+    Fixed 7 x 24 x len(value_fields) cube of sums by day of week and hour.
+    DayOfWeek codes run MONDAY=2 .. SUNDAY=8; anything else is ignored.
+    """
+
+    FIRST_DAY_CODE = 2
+
+    def __init__(self, day_field, hour_field, value_fields):
+        self.day_field = day_field
+        self.hour_field = hour_field
+        self.value_fields = list(value_fields)
+        self.rows_seen = 0
+        self.truncated = False
+        self.cube = np.zeros((7, 24, len(self.value_fields)), dtype=np.float64)
+
+    def cache_tag(self):
+        return f"hourly:{','.join(self.value_fields)}"
+
+    def add(self, columns):
+        days = np.asarray(columns[self.day_field], dtype=np.int64) - self.FIRST_DAY_CODE
+        hours = np.asarray(columns[self.hour_field], dtype=np.int64)
+        self.rows_seen += len(days)
+        valid = (days >= 0) & (days < 7) & (hours >= 0) & (hours < 24)
+        values = np.column_stack([np.asarray(columns[f], dtype=np.float64)[valid] for f in self.value_fields])
+        np.add.at(self.cube, (days[valid], hours[valid]), values)
+
+    def result(self):
+        return self.cube
+
+    def dump(self):
+        return {"rows_seen": self.rows_seen, "cube": self.cube.tobytes()}
+
+    def load(self, payload):
+        self.rows_seen = payload["rows_seen"]
+        self.cube = np.frombuffer(payload["cube"], dtype=np.float64).reshape(self.cube.shape).copy()
+
+
+def fetch_stats(accumulator, kept_rows):
+    """Row counts reported alongside each fetch result (stored in DataFrame.attrs)."""
+    return {
+        "rows_streamed": int(accumulator.rows_seen),
+        "rows_kept": int(kept_rows),
+        "truncated": bool(accumulator.truncated),
+    }
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import threading
+import subprocess
+import urllib.request
+from contextlib import contextmanager
+from concurrent.futures import Future
+from . import services
+from .config import CHROME_PATH, USER_DATA_DIR, DEBUGGING_PORT
+
+# === Browser Pool Config ===
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "3"))        # browsers = keywords scraped in parallel
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))       # recycle a browser after this many pages
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1024"))   # ... or once its processes use this much memory
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-software-rasterizer",
+]
+CHROME_START_TIMEOUT = 15
+CDP_MAX_TABS = int(os.getenv("CDP_MAX_TABS", "4"))                  # concurrent pychrome scrapes, all audits
+CDP_LEASE_TIMEOUT = float(os.getenv("CDP_LEASE_TIMEOUT", "60"))     # max wait for a free tab
+PAGE_LOAD_TIMEOUT = 10
+
+
+def _process_tree_rss_mb(marker):
+    """RSS of the browser whose command line carries marker, plus its child processes."""
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    total = 0
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            if marker in " ".join(proc.cmdline()):
+                total += proc.memory_info().rss
+                total += sum(child.memory_info().rss for child in proc.children(recursive=True))
+        except (psutil.Error, OSError):
+            continue
+    return total / (1024 * 1024)
+
+
+class _BrowserWorker:
+    """One Playwright driver + Chromium, owned by (and only used from) one pool thread."""
+
+    def __init__(self):
+        from playwright.sync_api import sync_playwright
+
+        # Unknown switches are ignored by Chrome; this one lets us find the process tree
+        self.marker = f"--audit-browser-id={uuid.uuid4().hex}"
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(headless=True, args=BROWSER_ARGS + [self.marker])
+        self.context = self.browser.new_context()
+        self.pages_served = 0
+
+    def healthy(self):
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    def worn_out(self):
+        if self.pages_served >= BROWSER_MAX_PAGES:
+            return True
+        return _process_tree_rss_mb(self.marker) > BROWSER_MAX_RSS_MB
+
+    def close(self):
+        for closer in (self.context.close, self.browser.close, self.playwright.stop):
+            try:
+                closer()
+            except Exception:
+                pass
+
+
+class BrowserPool:
+    """
+    Long-lived headless browsers for scraping. submit(fn, *args) runs fn(page, *args) on
+    one of BROWSER_POOL_SIZE threads, each owning its own browser (Playwright's sync API
+    is bound to the thread that started it), with a fresh page in that browser's shared
+    context. Browsers are started on first use, replaced when they crash or fail a
+    health check, and recycled after BROWSER_MAX_PAGES pages or BROWSER_MAX_RSS_MB.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE):
+        self.size = size
+        self._tasks = queue.Queue()
+        self._threads = [
+            threading.Thread(target=self._serve, name=f"browser-{i}", daemon=True) for i in range(size)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        self._tasks.put((future, fn, args))
+        return future
+
+    def _serve(self):
+        worker = None
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, fn, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is not None and not worker.healthy():
+                    print("⚠️ Browser failed health check; restarting it")
+                    worker.close()
+                    worker = None
+                if worker is None:
+                    worker = _BrowserWorker()
+                page = worker.context.new_page()
+                try:
+                    future.set_result(fn(page, *args))
+                finally:
+                    worker.pages_served += 1
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+            except Exception as e:
+                future.set_exception(e)
+            if worker is not None and (not worker.healthy() or worker.worn_out()):
+                worker.close()
+                worker = None
+        if worker is not None:
+            worker.close()
+
+    def shutdown(self, wait=True):
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ChromeLauncher:
+    """
+    The Chrome with remote debugging that pychrome drives (also behind the
+    chrome_debugger service). Started once per process and reused; an instance already
+    answering on the port is used as-is. A Chrome started here is terminated and
+    reaped at shutdown.
+    """
+
+    def __init__(self, port=DEBUGGING_PORT, user_data_dir=USER_DATA_DIR):
+        self.port = port
+        self.user_data_dir = user_data_dir
+        self._process = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def responding(self):
+        try:
+            with urllib.request.urlopen(f"{self.url}/json/version", timeout=1) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def ensure_running(self):
+        """Start Chrome if nothing answers on the debugging port; True once it does."""
+        with self._lock:
+            if self.responding():
+                return True
+            if self._process is not None and self._process.poll() is not None:
+                self._process = None  # exited: reaped by poll()
+            if self._process is None:
+                os.makedirs(self.user_data_dir, exist_ok=True)
+                try:
+                    self._process = subprocess.Popen([
+                        CHROME_PATH,
+                        f"--remote-debugging-port={self.port}",
+                        f"--user-data-dir={self.user_data_dir}",
+                        "--no-first-run",
+                        "--no-default-browser-check",
+                        "--headless",
+                        "--no-sandbox",
+                        "--disable-gpu",
+                        "--disable-dev-shm-usage"
+                    ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                except OSError as e:
+                    print("⚠️ Could not launch local Chrome for pychrome:", e)
+                    return False
+            # Ready as soon as the DevTools endpoint answers (no fixed sleep)
+            deadline = time.monotonic() + CHROME_START_TIMEOUT
+            while time.monotonic() < deadline:
+                if self.responding():
+                    return True
+                if self._process.poll() is not None:
+                    print(f"⚠️ Chrome exited during startup (code {self._process.returncode})")
+                    self._process = None
+                    return False
+                time.sleep(0.1)
+            print("⚠️ Chrome did not open its debugging port in time")
+            return False
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            process, self._process = self._process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=5 if wait else 0.5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class CdpTabPool:
+    """
+    Tabs of the cdp_chrome debugger for pychrome, at most CDP_MAX_TABS at a time across
+    every audit in the process. Each lease gets its own browser context and target
+    (Target.createBrowserContext / createTarget), so concurrent scrapes never share
+    cookies or navigate over each other; both are closed when the lease ends.
+    """
+
+    def __init__(self, max_tabs=CDP_MAX_TABS):
+        self.max_tabs = max_tabs
+        self._slots = threading.BoundedSemaphore(max_tabs)
+        self._lock = threading.Lock()  # pychrome connections are not safe for concurrent calls
+        self._session = None
+
+    def _browser_call(self, method, **params):
+        import pychrome
+
+        launcher = services.get("cdp_chrome")
+        with self._lock:
+            for attempt in range(2):
+                if self._session is None:
+                    if not launcher.ensure_running():
+                        raise RuntimeError("Chrome debugger is not available")
+                    with urllib.request.urlopen(f"{launcher.url}/json/version", timeout=5) as response:
+                        ws_url = json.loads(response.read())["webSocketDebuggerUrl"]
+                    self._session = pychrome.Tab(id="browser", type="browser", webSocketDebuggerUrl=ws_url)
+                    self._session.start()
+                try:
+                    return self._session.call_method(method, _timeout=10, **params)
+                except (pychrome.RuntimeException, pychrome.TimeoutException, OSError):
+                    # Chrome restarted or the socket dropped: reconnect once
+                    self._drop_session()
+                    if attempt:
+                        raise
+
+    def _drop_session(self):
+        session, self._session = self._session, None
+        if session is not None:
+            try:
+                session.stop()
+            except Exception:
+                pass
+
+    @contextmanager
+    def lease(self, timeout=CDP_LEASE_TIMEOUT):
+        """Yield a started pychrome tab in a fresh browser context."""
+        import pychrome
+
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No debugger tab free within {timeout:.0f}s")
+        context_id = target_id = tab = None
+        try:
+            context_id = self._browser_call("Target.createBrowserContext")["browserContextId"]
+            target_id = self._browser_call(
+                "Target.createTarget", url="about:blank", browserContextId=context_id
+            )["targetId"]
+            port = services.get("cdp_chrome").port
+            tab = pychrome.Tab(
+                id=target_id, type="page",
+                webSocketDebuggerUrl=f"ws://127.0.0.1:{port}/devtools/page/{target_id}",
+            )
+            tab.start()
+            yield tab
+        finally:
+            if tab is not None:
+                try:
+                    tab.stop()
+                except Exception:
+                    pass
+            if target_id is not None:
+                self._cleanup("Target.closeTarget", targetId=target_id)
+            if context_id is not None:
+                self._cleanup("Target.disposeBrowserContext", browserContextId=context_id)
+            self._slots.release()
+
+    def _cleanup(self, method, **params):
+        try:
+            self._browser_call(method, **params)
+        except Exception as e:
+            print(f"⚠️ Could not clean up debugger tab ({method}): {e}")
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._drop_session()
+
+
+def navigate_and_wait(tab, url, timeout=PAGE_LOAD_TIMEOUT):
+    """Navigate a leased tab and block until Page.loadEventFired; False if it timed out."""
+    loaded = threading.Event()
+    tab.set_listener("Page.loadEventFired", lambda **kwargs: loaded.set())
+    tab.call_method("Page.enable")
+    tab.call_method("Page.navigate", url=url)
+    return loaded.wait(timeout)
+
+
+services.register("browser_pool", BrowserPool)
+services.register("cdp_chrome", ChromeLauncher)
+services.register("cdp_tabs", CdpTabPool)
+
+
+@atexit.register
+def _shutdown_browsers():
+    # Never leave Chrome processes behind when the server exits
+    for name in ("browser_pool", "cdp_tabs", "cdp_chrome"):
+        if services.is_initialized(name):
+            services.get(name).shutdown(wait=False)
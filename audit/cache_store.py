@@ -0,0 +1,162 @@
+import os
+import time
+import sqlite3
+import threading
+
+# === Disk Cache Defaults ===
+CACHE_DIR = os.getenv("AUDIT_CACHE_DIR", "cache")
+
+
+class DiskCache:
+    """
+    Small SQLite-backed key/value cache shared by every thread and gunicorn worker.
+    - Values are bytes; expiry is a per-entry TTL.
+    - Size is bounded by max_bytes with least-recently-used eviction.
+    - WAL mode + a busy timeout make concurrent readers/writers across processes safe.
+    """
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries(expires_at)")
+            # Running total of entry sizes, kept by triggers so a write never has to SUM the table
+            conn.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO totals (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_size_insert AFTER INSERT ON entries
+                BEGIN UPDATE totals SET bytes = bytes + NEW.size WHERE id = 0; END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_size_delete AFTER DELETE ON entries
+                BEGIN UPDATE totals SET bytes = bytes - OLD.size WHERE id = 0; END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS entries_size_update AFTER UPDATE OF size ON entries
+                BEGIN UPDATE totals SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END
+            """)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _connect(self):
+        # One connection per thread and per process (connections must not cross a fork).
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Return the cached bytes for key, or None on a miss/expired entry."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count(False)
+                return None
+            value, expires_at = row
+            if expires_at < now:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count(False)
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._count(True)
+            return bytes(value)
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache read failed ({self.path}): {e}")
+            self._count(False)
+            return None
+
+    def set(self, key, value, ttl_seconds=None):
+        """Store bytes under key, then evict least-recently-used entries over max_bytes."""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            conn = self._connect()
+            # An upsert (not INSERT OR REPLACE) so the size triggers see replacements
+            conn.execute(
+                "INSERT INTO entries (key, value, size, created_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "size = excluded.size, created_at = excluded.created_at, "
+                "expires_at = excluded.expires_at, last_access = excluded.last_access",
+                (key, sqlite3.Binary(value), len(value), now, now + ttl, now),
+            )
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache write failed ({self.path}): {e}")
+
+    def delete(self, key):
+        try:
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache delete failed ({self.path}): {e}")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        total = conn.execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current on-disk footprint."""
+        try:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, total = None, None
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,84 @@
+import io
+import os
+from . import services
+
+# === Chart Rendering Config ===
+HEATMAP_METRICS = ["Clicks", "Conversions", "CVR"]
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+# matplotlib work runs in its own process pool, created on first use
+services.register("chart_pool", lambda: services.spawn_pool(CHART_WORKERS))
+
+
+def render_heatmap(metric, values, days, hours):
+    """Render one Day x Hour heatmap and return it as PNG bytes (runs in a pool worker)."""
+    import pandas as pd
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    heat_data = pd.DataFrame(values, index=days, columns=hours)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    try:
+        sns.heatmap(heat_data, annot=True, fmt=".2f", cmap="coolwarm", ax=ax)
+        ax.set_title(f"Heatmap: {metric} by Day and Hour")
+        fig.tight_layout()
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def render_heatmaps(hourly_cube, metrics=HEATMAP_METRICS):
+    """
+    Render the hourly heatmaps for one report (from its hourly_cube.HourlyCube) in the
+    chart process pool. Returns {metric: PNG bytes}; empty if there is no hourly data.
+    """
+    if hourly_cube is None or hourly_cube.empty:
+        return {}
+    jobs = {}
+    for metric in metrics:
+        heat_data = hourly_cube.grid(metric)
+        jobs[metric] = (metric, heat_data.to_numpy(), heat_data.index.tolist(), heat_data.columns.tolist())
+
+    try:
+        pool = services.get("chart_pool")
+        futures = {metric: pool.submit(render_heatmap, *args) for metric, args in jobs.items()}
+        return {metric: fut.result() for metric, fut in futures.items()}
+    except Exception as e:
+        # A broken pool (e.g. a worker killed for memory) is replaced on the next call;
+        # this report is rendered in-process instead.
+        print(f"⚠️ Chart pool failed ({e}); rendering heatmaps in-process")
+        services.reset("chart_pool")
+        images = {}
+        for metric, args in jobs.items():
+            try:
+                images[metric] = render_heatmap(*args)
+            except Exception as render_error:
+                print(f"❌ Failed to render {metric} heatmap: {render_error}")
+        return images
+
+
+def heatmap_dir(report_path):
+    """Folder holding the heatmap PNGs of one report (next to the .docx)."""
+    return os.path.splitext(os.path.abspath(report_path))[0] + "_images"
+
+
+def heatmap_filename(metric):
+    return f"{metric}_heatmap.png"
+
+
+def save_heatmaps(images, report_path):
+    """Write the rendered heatmaps next to their report so any web worker can serve them."""
+    if not images:
+        return None
+    directory = heatmap_dir(report_path)
+    os.makedirs(directory, exist_ok=True)
+    for metric, png in images.items():
+        tmp_path = os.path.join(directory, heatmap_filename(metric) + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, os.path.join(directory, heatmap_filename(metric)))
+    return directory
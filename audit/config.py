@@ -1,10 +1,6 @@
 import os
-import pandas as pd
-import subprocess
-import psutil
-from google.ads.googleads.client import GoogleAdsClient
-import google.generativeai as genai
 from dotenv import load_dotenv
+from . import services
 
 # === Load environment variables from .env ===
 load_dotenv()
@@ -21,62 +17,77 @@ else:
     CHROME_PATH = "/usr/bin/google-chrome"
 # === User Data Dir Setup ===
 USER_DATA_DIR = os.path.join(os.getcwd(), "ChromeDebugProfile")
-os.makedirs(USER_DATA_DIR, exist_ok=True)
 
 # === Chrome Debugging Port ===
 DEBUGGING_PORT = "9222"
 
 # === Auto-launch Chrome function ===
 def ensure_chrome_debugger():
-    """Force-launch Chrome with remote debugging enabled on port 9222."""
-    chrome_running = False
-    for proc in psutil.process_iter(attrs=['cmdline']):
-        try:
-            cmdline = " ".join(proc.info['cmdline'])
-            if f"--remote-debugging-port={DEBUGGING_PORT}" in cmdline:
-                chrome_running = True
-                break
-        except Exception:
-            continue
-
-    if not chrome_running:
-        print("🚀 Launching Chrome in debugging mode...")
-        chrome_args = [
-            CHROME_PATH,
-            f"--remote-debugging-port={DEBUGGING_PORT}",
-            f"--user-data-dir={USER_DATA_DIR}"
-        ]
-        # Add headless and Linux-specific flags on Render
-        if not IS_WINDOWS:
-            chrome_args += ["--headless", "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage"]
+    """Chrome with remote debugging on DEBUGGING_PORT: the shared, reaped cdp_chrome launcher."""
+    from . import browser_pool  # registers cdp_chrome (imports this module, so not at top level)
 
-        subprocess.Popen(chrome_args)
+    launcher = services.get("cdp_chrome")
+    if not launcher.responding():
+        print("🚀 Launching Chrome in debugging mode...")
+    launcher.ensure_running()
+    return launcher
 
-# Auto-launch Chrome
-if os.getenv("LAUNCH_CHROME_FROM_PYTHON", "0") == "1":
-    ensure_chrome_debugger()
+# Auto-launch Chrome: done on first use (services.get("chrome_debugger")), not at import
+LAUNCH_CHROME_FROM_PYTHON = os.getenv("LAUNCH_CHROME_FROM_PYTHON", "0") == "1"
+services.register("chrome_debugger", ensure_chrome_debugger)
 
 # === Global Config (Customer IDs) ===
 CUSTOMER_ID = os.getenv("GOOGLE_ADS_CUSTOMER_ID")
 LOGIN_CUSTOMER_ID = os.getenv("GOOGLE_ADS_LOGIN_CUSTOMER_ID")
 
 # === Gemini Config ===
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel("gemini-2.5-flash")
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME", "gemini-2.5-flash")
+
+
+def _build_gemini_model():
+    import google.generativeai as genai
+    from .gemini_cache import cached_model
+    from .gemini_client import RateLimitedModel
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    # Shared model: repeat prompts are answered from the on-disk response cache; the rest
+    # go through the process-wide rate limiter / retry layer
+    return cached_model(RateLimitedModel(genai.GenerativeModel(GEMINI_MODEL_NAME)), GEMINI_MODEL_NAME)
+
+
+services.register("gemini_model", _build_gemini_model)
+model = services.LazyService("gemini_model")
 
 # === Google Ads Client ===
+# The fetchers decode raw protobuf rows either way (see ingest.RAW_DECODE); this only
+# changes what other callers of the client get back.
+USE_PROTO_PLUS = os.getenv("GOOGLE_ADS_USE_PROTO_PLUS", "1") == "1"
 google_ads_config = {
     "developer_token": os.getenv("GOOGLE_ADS_DEVELOPER_TOKEN"),
     "client_id": os.getenv("GOOGLE_ADS_CLIENT_ID"),
     "client_secret": os.getenv("GOOGLE_ADS_CLIENT_SECRET"),
     "refresh_token": os.getenv("GOOGLE_ADS_REFRESH_TOKEN"),
     "login_customer_id": LOGIN_CUSTOMER_ID,
-    "use_proto_plus": True,
+    "use_proto_plus": USE_PROTO_PLUS,
     "token_uri": "https://oauth2.googleapis.com/token",
 }
-google_ads_client = GoogleAdsClient.load_from_dict(google_ads_config)
+
+
+def _build_google_ads_client():
+    from google.ads.googleads.client import GoogleAdsClient
+
+    return GoogleAdsClient.load_from_dict(google_ads_config)
+
+
+# Built on first use in each process, so a preloaded (pre-fork) app holds no gRPC channel
+services.register("google_ads_client", _build_google_ads_client)
+google_ads_client = services.LazyService("google_ads_client")
 client = google_ads_client
 
+# === Fetch Limits ===
+# Keyword rows are streamed in full but only the top N by cost are kept in memory
+KEYWORD_MAX_ROWS = int(os.getenv("KEYWORD_MAX_ROWS", "20000"))
+
 # === Environment Constants ===
 LANGUAGE = "English"
 DEVICE = "Desktop"
@@ -90,16 +101,28 @@ BID_STRATEGY_MAP = {
     8: "PAGE_ONE_PROMOTED", 9: "PERCENT_CPC", 10: "TARGET_CPA", 11: "TARGET_CPM",
     12: "TARGET_CPV", 13: "TARGET_IMPRESSION_SHARE", 14: "TARGET_ROAS", 15: "TARGET_SPEND"
 }
+# DayOfWeekEnum.DayOfWeek values (kept literal to avoid importing the v20 enums at startup)
+DAY_OF_WEEK_MAP = {
+    0: "Unspecified", 1: "Unknown", 2: "Monday", 3: "Tuesday", 4: "Wednesday",
+    5: "Thursday", 6: "Friday", 7: "Saturday", 8: "Sunday"
+}
 
-# === Geo Lookup DataFrame ===
-GEO_LOOKUP_DF = pd.read_csv("geotargets-2025-07-15.csv")
-GEO_LOOKUP_DF = GEO_LOOKUP_DF[GEO_LOOKUP_DF["Status"] == "Active"]
-GEO_LOOKUP_DF.set_index("Criteria ID", inplace=True)
+# === Geo Lookup ===
+# Location names come from the memory-mapped index in audit/geo_index.py, built from
+# geotargets-2025-07-15.csv on first use (or ahead of time: python -m audit.geo_index).
 
 # === Ensure required folders exist ===
-os.makedirs("report_images", exist_ok=True)
-os.makedirs("generated_reports", exist_ok=True)
-os.makedirs("user_tokens", exist_ok=True)
+REPORTS_DIR = "generated_reports"
+OUTPUT_DIRS = [REPORTS_DIR, "user_tokens"]
+
+
+def ensure_output_dirs():
+    for path in OUTPUT_DIRS:
+        os.makedirs(path, exist_ok=True)
+    return True
+
+
+services.register("output_dirs", ensure_output_dirs)
 
 # Backwards compatibility
 customer_id = CUSTOMER_ID
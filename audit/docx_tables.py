@@ -0,0 +1,141 @@
+import os
+import numpy as np
+import pandas as pd
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Length
+
+# Bulk .docx table writer: cells are formatted a column at a time with pandas and the
+# whole <w:tbl> is built as one XML string and parsed once, instead of add_row() and
+# cell.text assignments (each of which walks and rebuilds the table XML).
+
+CURRENCY_COLUMNS = ["Avg CPC", "CPA ($)", "Cost ($)"]
+PERCENT_COLUMNS = ["CTR"]
+
+_CONTROL_CHARS = r"[\x00-\x08\x0b\x0c\x0e-\x1f]"  # not allowed in XML; python-docx would raise
+
+
+def _as_text(series):
+    return pd.Series(series, dtype=object).astype(str)
+
+
+def format_column(values, column):
+    """
+    One report column as strings: "$1.23" for currency columns, "4.56%" for CTR
+    (stored as a ratio), str(value) otherwise. Empty/zero numbers format as $0.00 /
+    0.00%; values that are not numbers are kept as text.
+    """
+    values = pd.Series(values, dtype=object) if not isinstance(values, pd.Series) else values
+    if column not in CURRENCY_COLUMNS and column not in PERCENT_COLUMNS:
+        return _as_text(values).to_numpy()
+
+    numbers = pd.to_numeric(values, errors="coerce")
+    empty = values.isna().to_numpy() | (values.astype(str) == "").to_numpy() | (numbers == 0).to_numpy()
+    if column in CURRENCY_COLUMNS:
+        formatted = np.char.add("$", np.char.mod("%.2f", numbers.fillna(0).to_numpy(dtype=float)))
+        zero = "$0.00"
+    else:
+        formatted = np.char.add(np.char.mod("%.2f", numbers.fillna(0).to_numpy(dtype=float) * 100), "%")
+        zero = "0.00%"
+    out = np.where(empty, zero, formatted).astype(object)
+    not_numeric = numbers.isna().to_numpy() & ~empty
+    if not_numeric.any():
+        out[not_numeric] = _as_text(values[not_numeric]).to_numpy()
+    return out
+
+
+def format_table(df, columns):
+    """Column-major string data for a report table; columns missing from df are blank."""
+    blank = np.full(len(df), "", dtype=object)
+    return [format_column(df[col], col) if col in df.columns else format_column(blank, col) for col in columns]
+
+
+def format_numeric_grid(df, fmt="%.2f"):
+    """Every column of a numeric grid (e.g. the hourly pivot) with zeros and gaps left blank."""
+    columns = []
+    for col in df.columns:
+        numbers = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+        keep = np.isfinite(numbers) & (numbers != 0)
+        columns.append(np.where(keep, np.char.mod(fmt, np.nan_to_num(numbers)), "").astype(object))
+    return columns
+
+
+def _xml_text(values):
+    """
+    Escaped <w:t> content for each cell, with tabs / newlines turned into <w:tab/> /
+    <w:br/>. xml:space="preserve" is only added where whitespace needs it: lxml is slow
+    to re-home xml:* attributes when the table is moved into the document.
+    """
+    text = _as_text(values).str.replace(_CONTROL_CHARS, "", regex=True)
+    text = text.str.replace("&", "&amp;", regex=False).str.replace("<", "&lt;", regex=False).str.replace(">", "&gt;", regex=False)
+    preserve = text.str.contains(r"^\s|\s$|[\t\r\n]", regex=True).to_numpy(dtype=bool)
+    if preserve.any():
+        special = text[preserve].str.replace("\r\n", "\n", regex=False).str.replace("\r", "\n", regex=False)
+        special = special.str.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">', regex=False)
+        special = special.str.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">', regex=False)
+        text[preserve] = '<w:t xml:space="preserve">' + special
+    text[~preserve] = "<w:t>" + text[~preserve]
+    return text.to_numpy()
+
+
+def _cell_xml(values, width):
+    prefix = f'<w:tc><w:tcPr><w:tcW w:w="{width}" w:type="dxa"/></w:tcPr><w:p><w:r>'
+    return prefix + _xml_text(values) + "</w:t></w:r></w:p></w:tc>"
+
+
+def table_xml(headers, columns, width_twips, align=None):
+    """The full <w:tbl> markup for a 'Table Grid' table with a header row."""
+    n_cols = len(headers)
+    col_width = int(width_twips // max(n_cols, 1))
+    jc = f'<w:jc w:val="{align}"/>' if align else ""
+    parts = [
+        f"<w:tbl {nsdecls('w')}><w:tblPr>"
+        f'<w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>{jc}'
+        '<w:tblLayout w:type="autofit"/>'
+        '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/>'
+        "</w:tblPr><w:tblGrid>",
+        f'<w:gridCol w:w="{col_width}"/>' * n_cols,
+        "</w:tblGrid><w:tr>",
+        "".join(_cell_xml(np.array(headers, dtype=object), col_width)),
+        "</w:tr>",
+    ]
+    if columns and len(columns[0]):
+        row_xml = "<w:tr>" + _cell_xml(columns[0], col_width)
+        for values in columns[1:]:
+            row_xml = row_xml + _cell_xml(values, col_width)
+        parts.append("".join(row_xml + "</w:tr>"))
+    parts.append("</w:tbl>")
+    return "".join(parts)
+
+
+def _text_width_twips(doc):
+    section = doc.sections[-1]
+    return Length(section.page_width - section.left_margin - section.right_margin).twips
+
+
+def add_bulk_table(doc, headers, columns, align=None):
+    """
+    Append a table to doc in one step. columns is column-major (one sequence of cell
+    strings per header); align is a WD_TABLE_ALIGNMENT value or None.
+    """
+    from docx.table import Table
+    from docx.enum.table import WD_TABLE_ALIGNMENT
+
+    jc = WD_TABLE_ALIGNMENT.to_xml(align) if align is not None else None
+    tbl = parse_xml(table_xml([str(h) for h in headers], columns, _text_width_twips(doc), jc))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
+
+
+def save_document(doc, target):
+    """
+    Write the document to a path (via a temp file renamed into place, so readers never
+    see a half-written report) or straight into a writable stream such as a response.
+    """
+    if hasattr(target, "write"):
+        doc.save(target)
+        return target
+    tmp_path = f"{target}.tmp"
+    doc.save(tmp_path)
+    os.replace(tmp_path, target)
+    return target
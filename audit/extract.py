@@ -0,0 +1,143 @@
+import os
+import time
+from . import services
+
+# === Text Extraction Config ===
+EXTRACT_MAX_BYTES = int(os.getenv("EXTRACT_MAX_BYTES", str(1024 * 1024)))  # HTML parsed per page
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_MIN_MAIN_CHARS = 200  # a <main>/<article> shorter than this is not trusted as the content
+
+# Never visible text
+DROP_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "head"]
+# Page chrome repeated on every page of a site
+# (forms stay: lead forms and CTAs are what the landing page audit looks at)
+BOILERPLATE_TAGS = ["nav", "header", "footer", "aside", "dialog"]
+BOILERPLATE_ROLES = ["navigation", "banner", "contentinfo", "dialog"]
+# Whole class / id tokens only: "hero-banner" or "section-header" blocks are content
+BOILERPLATE_NAMES = {"nav", "navbar", "site-header", "site-footer", "cookie-banner", "breadcrumb"}
+MAIN_XPATH = "//main | //article | //*[@role='main'] | //*[@id='content' or @id='main' or @id='main-content']"
+
+# Extraction runs in its own process pool, created on first use
+services.register("extract_pool", lambda: services.spawn_pool(EXTRACT_WORKERS))
+
+
+def _drop(elements):
+    for el in elements:
+        if el.getparent() is not None:
+            el.drop_tree()  # keeps the element's tail text
+
+
+def _is_boilerplate_name(el):
+    names = f"{el.get('class', '')} {el.get('id', '')}".lower().split()
+    return not BOILERPLATE_NAMES.isdisjoint(names)
+
+
+def _text(node):
+    # Same output as BeautifulSoup's get_text(separator=" ", strip=True)
+    return " ".join(s.strip() for s in node.itertext() if s.strip())
+
+
+def _parse(data, encoding):
+    """lxml document for the HTML bytes, with never-visible elements already removed."""
+    import lxml.html
+    from lxml import etree
+
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+        root = lxml.html.document_fromstring(data, parser=parser)
+    except (etree.ParserError, ValueError, LookupError):
+        root = lxml.html.document_fromstring(data.decode("utf-8", errors="replace"))
+    _drop(root.xpath(" | ".join(f"//{tag}" for tag in DROP_TAGS)))
+    return root
+
+
+def extract_text(body, encoding=None, max_bytes=EXTRACT_MAX_BYTES, main_content=True):
+    """
+    Visible text of an HTML page (bytes or str), parsed with lxml.
+    Only the first max_bytes are parsed. With main_content, navigation / header /
+    footer / cookie banners and similar chrome are removed and, when the page marks
+    up its main content (<main>, <article>, role=main), only that is kept.
+    Returns a dict: text, bytes_in, chars_out, truncated, main_content (bool), elapsed.
+    """
+    start = time.perf_counter()
+    if isinstance(body, str):
+        body = body.encode(encoding or "utf-8", errors="replace")
+        encoding = encoding or "utf-8"
+    body = body or b""
+    truncated = len(body) > max_bytes
+    data = body[:max_bytes]
+    result = {"text": "", "bytes_in": len(data), "chars_out": 0, "truncated": truncated,
+              "main_content": False, "elapsed": 0.0}
+    if not data.strip():
+        return result
+
+    root = _parse(data, encoding)
+    text = ""
+    if main_content:
+        outside_main = "not(ancestor::main or ancestor::article)"
+        _drop(root.xpath(" | ".join(
+            f"//{tag}[{outside_main}]" if tag in ("header", "footer") else f"//{tag}"
+            for tag in BOILERPLATE_TAGS
+        )))
+        _drop([
+            el for el in root.xpath(f"//*[(@class or @id or @role) and {outside_main}]")
+            if el.tag not in ("html", "body", "main", "article")
+            and (el.get("role") in BOILERPLATE_ROLES or _is_boilerplate_name(el))
+        ])
+        for candidate in root.xpath(MAIN_XPATH):
+            candidate_text = _text(candidate)
+            if len(candidate_text) >= EXTRACT_MIN_MAIN_CHARS:
+                text = candidate_text
+                result["main_content"] = True
+                break
+        if not text:
+            text = _text(root)
+        if not text:
+            text = _text(_parse(data, encoding))  # everything was chrome: better some text than none
+    else:
+        text = _text(root)
+
+    result["text"] = text
+    result["chars_out"] = len(text)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def _extract_job(args):
+    body, encoding, max_bytes, main_content = args
+    try:
+        return extract_text(body, encoding, max_bytes, main_content)
+    except Exception as e:
+        return {"text": "", "bytes_in": len(body or b""), "chars_out": 0, "truncated": False,
+                "main_content": False, "elapsed": 0.0, "error": str(e)}
+
+
+def extract_many(pages, max_bytes=EXTRACT_MAX_BYTES, main_content=True):
+    """
+    Extract several pages in the process pool (lxml parsing is CPU-bound and would
+    otherwise serialize on the GIL). pages is {key: (body, encoding)}; returns
+    {key: extraction dict}. Falls back to in-process extraction if the pool breaks.
+    """
+    jobs = {key: (body[:max_bytes] if body else b"", encoding, max_bytes, main_content)
+            for key, (body, encoding) in pages.items()}
+    if not jobs:
+        return {}
+    start = time.perf_counter()
+    try:
+        pool = services.get("extract_pool")
+        chunksize = max(1, len(jobs) // (EXTRACT_WORKERS * 4))
+        results = dict(zip(jobs, pool.map(_extract_job, jobs.values(), chunksize=chunksize)))
+    except Exception as e:
+        print(f"⚠️ Extraction pool failed ({e}); extracting in-process")
+        services.reset("extract_pool")
+        results = {key: _extract_job(args) for key, args in jobs.items()}
+
+    # Truncation happened before the pages were shipped to the pool
+    for key, (body, _) in pages.items():
+        if body and len(body) > max_bytes:
+            results[key]["truncated"] = True
+    bytes_in = sum(r["bytes_in"] for r in results.values())
+    chars_out = sum(r["chars_out"] for r in results.values())
+    print(f"ℹ️ Extracted {len(results)} pages: {bytes_in / 1024:.0f} KB HTML -> {chars_out} chars "
+          f"in {time.perf_counter() - start:.2f}s")
+    return results
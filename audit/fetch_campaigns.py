@@ -1,9 +1,29 @@
+from typing import TYPE_CHECKING
 import pandas as pd
 from .config import STATUS_MAP, BID_STRATEGY_MAP
-from google.ads.googleads.client import GoogleAdsClient
+from .gaql_cache import search_aggregate
+from .aggregate import ColumnCollector, fetch_stats
+from .ingest import micros_to_currency, safe_ratio, map_codes
 
-def fetch_campaign_data(client: GoogleAdsClient, customer_id: str, date_range="LAST_30_DAYS"):
-    service = client.get_service("GoogleAdsService")
+if TYPE_CHECKING:  # annotation only; google.ads is slow to import
+    from google.ads.googleads.client import GoogleAdsClient
+
+CAMPAIGN_SCHEMA = {
+    "campaign.id": "int64",
+    "campaign.name": object,
+    "campaign.status": "int32",
+    "campaign.start_date": object,
+    "campaign.bidding_strategy_type": "int32",
+    "campaign_budget.amount_micros": "int64",
+    "metrics.impressions": "int64",
+    "metrics.clicks": "int64",
+    "metrics.ctr": "float64",
+    "metrics.average_cpc": "float64",
+    "metrics.cost_micros": "int64",
+    "metrics.conversions": "float64",
+}
+
+def fetch_campaign_data(client: "GoogleAdsClient", customer_id: str, date_range="LAST_30_DAYS"):
     query = f"""
         SELECT campaign.id, campaign.name, campaign.status, campaign.start_date,
                campaign.bidding_strategy_type, campaign_budget.amount_micros,
@@ -14,33 +34,30 @@ def fetch_campaign_data(client: GoogleAdsClient, customer_id: str, date_range="L
         AND campaign.status = 'ENABLED'
         AND metrics.impressions > 0
         AND segments.date DURING {date_range}
-        LIMIT 100
     """
     try:
-        response = service.search_stream(customer_id=customer_id, query=query)
+        collector = search_aggregate(client, customer_id, query, CAMPAIGN_SCHEMA, ColumnCollector(CAMPAIGN_SCHEMA))
     except Exception as e:
         print(f"❌ Error fetching campaign data: {e}")
         return pd.DataFrame()
 
-    data = []
-    for batch in response:
-        for row in batch.results:
-            cost = row.metrics.cost_micros / 1e6 if row.metrics.cost_micros else 0
-            conversions = row.metrics.conversions or 0
-            cpa = cost / conversions if conversions else 0
-            data.append({
-                "Campaign ID": row.campaign.id,
-                "Campaign Name": row.campaign.name,
-                "Status": STATUS_MAP.get(row.campaign.status, "UNKNOWN"),
-                "Start Date": row.campaign.start_date,
-                "Bid Strategy": BID_STRATEGY_MAP.get(row.campaign.bidding_strategy_type, "UNKNOWN"),
-                "Budget/day ($)": row.campaign_budget.amount_micros / 1e6 if row.campaign_budget.amount_micros else 0,
-                "Impressions": row.metrics.impressions,
-                "Clicks": row.metrics.clicks,
-                "CTR": row.metrics.ctr,
-                "Avg CPC": row.metrics.average_cpc / 1e6 if row.metrics.average_cpc else 0,
-                "Cost ($)": cost,
-                "Conversions": conversions,
-                "CPA ($)": cpa
-            })
-    return pd.DataFrame(data)
+    cols = collector.result()
+    cost = micros_to_currency(cols["metrics.cost_micros"])
+    conversions = cols["metrics.conversions"]
+    df = pd.DataFrame({
+        "Campaign ID": cols["campaign.id"],
+        "Campaign Name": cols["campaign.name"],
+        "Status": map_codes(cols["campaign.status"], STATUS_MAP),
+        "Start Date": cols["campaign.start_date"],
+        "Bid Strategy": map_codes(cols["campaign.bidding_strategy_type"], BID_STRATEGY_MAP),
+        "Budget/day ($)": micros_to_currency(cols["campaign_budget.amount_micros"]),
+        "Impressions": cols["metrics.impressions"],
+        "Clicks": cols["metrics.clicks"],
+        "CTR": cols["metrics.ctr"],
+        "Avg CPC": micros_to_currency(cols["metrics.average_cpc"]),
+        "Cost ($)": cost,
+        "Conversions": conversions,
+        "CPA ($)": safe_ratio(cost, conversions)
+    })
+    df.attrs["fetch_stats"] = fetch_stats(collector, len(df))
+    return df
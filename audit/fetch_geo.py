@@ -1,9 +1,22 @@
+from typing import TYPE_CHECKING
 import pandas as pd
-from .utils_web import resolve_geo_names_from_csv, extract_location_parts
-from google.ads.googleads.client import GoogleAdsClient
+from .utils_web import resolve_geo_frame, extract_location_parts
+from .gaql_cache import search_aggregate
+from .aggregate import GroupSum, fetch_stats
+from .ingest import micros_to_currency, safe_ratio
 
-def fetch_geo_performance_data(client: GoogleAdsClient, customer_id: str):
-    service = client.get_service("GoogleAdsService")
+if TYPE_CHECKING:  # annotation only; google.ads is slow to import
+    from google.ads.googleads.client import GoogleAdsClient
+
+GEO_SCHEMA = {
+    "geographic_view.country_criterion_id": "int64",
+    "metrics.impressions": "int64",
+    "metrics.clicks": "int64",
+    "metrics.conversions": "float64",
+    "metrics.cost_micros": "int64",
+}
+
+def fetch_geo_performance_data(client: "GoogleAdsClient", customer_id: str):
     query = """
         SELECT 
             geographic_view.country_criterion_id,
@@ -16,50 +29,41 @@ def fetch_geo_performance_data(client: GoogleAdsClient, customer_id: str):
         WHERE segments.date DURING LAST_30_DAYS
         AND metrics.impressions > 0
         AND geographic_view.location_type = 'LOCATION_OF_PRESENCE'
-        LIMIT 10000
     """
+    accumulator = GroupSum(
+        "geographic_view.country_criterion_id",
+        ["metrics.impressions", "metrics.clicks", "metrics.conversions", "metrics.cost_micros"]
+    )
     try:
-        response = service.search_stream(customer_id=customer_id, query=query)
+        search_aggregate(client, customer_id, query, GEO_SCHEMA, accumulator)
     except Exception as e:
         print(f"❌ Error fetching geo data: {e}")
         return pd.DataFrame()
 
-    data = []
-    geo_ids = set()
-
-    print("\n=== RAW API PAYLOAD (from Google Ads) ===")
-    for batch in response:
-        for row in batch.results:
-            # Print the raw Google Ads API object for this location
-            print(row)
-
-            geo_id = row.geographic_view.country_criterion_id
-            geo_ids.add(geo_id)
-            cost = row.metrics.cost_micros / 1e6 if row.metrics.cost_micros else 0
-            if cost == 0:
-                continue
-            conversions = row.metrics.conversions or 0
-            clicks = row.metrics.clicks or 0
-            cvr = conversions / clicks if clicks else     0
-            cpa = cost / conversions if conversions else 0
-            data.append({
-                "Geo ID": geo_id,
-                "Impressions": row.metrics.impressions,
-                "Clicks": clicks,
-                "Conversions": conversions,
-                "Cost ($)": cost,
-                "CVR": cvr,
-                "CPA ($)": cpa
-            })
-
-    if not data:
+    print(f"\n=== RAW API PAYLOAD (from Google Ads): {accumulator.rows_seen} rows ===")
+    sums = accumulator.result()
+    cost = micros_to_currency(sums["metrics.cost_micros"])
+    keep = cost != 0
+    if not keep.any():
         return pd.DataFrame()
 
-    # Process into DataFrame
-    df = pd.DataFrame(data)
-    geo_info = resolve_geo_names_from_csv(df["Geo ID"].unique())
-    df["Canonical Name"] = df["Geo ID"].apply(lambda x: geo_info.get(x, {}).get("canonical_name", f"GeoID {x}"))
-    df["Type"] = df["Geo ID"].apply(lambda x: geo_info.get(x, {}).get("type", "Unknown"))
+    clicks = sums["metrics.clicks"][keep]
+    conversions = sums["metrics.conversions"][keep]
+    cost = cost[keep]
+
+    # Process into DataFrame (one row per location, summed while streaming)
+    df = pd.DataFrame({
+        "Geo ID": sums["geographic_view.country_criterion_id"][keep].astype("int64"),
+        "Impressions": sums["metrics.impressions"][keep].astype("int64"),
+        "Clicks": clicks.astype("int64"),
+        "Conversions": conversions,
+        "Cost ($)": cost,
+        "CVR": safe_ratio(conversions, clicks),
+        "CPA ($)": safe_ratio(cost, conversions)
+    })
+    geo_info = resolve_geo_frame(df["Geo ID"].to_numpy())
+    df["Canonical Name"] = geo_info["canonical_name"].to_numpy()
+    df["Type"] = geo_info["target_type"].to_numpy()
     location_parts = df["Canonical Name"].apply(extract_location_parts)
     df = pd.concat([df, location_parts], axis=1)
     df = df[[
@@ -69,4 +73,5 @@ def fetch_geo_performance_data(client: GoogleAdsClient, customer_id: str):
     print("\n=== PROCESSED GEO PERFORMANCE DATA ===")
     print(df.to_string(index=False))
 
+    df.attrs["fetch_stats"] = fetch_stats(accumulator, len(df))
     return df
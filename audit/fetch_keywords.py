@@ -1,9 +1,26 @@
+from typing import TYPE_CHECKING
 import pandas as pd
-from google.ads.googleads.client import GoogleAdsClient
-from .config import MATCH_TYPE_MAP
+from .gaql_cache import search_aggregate
+from .aggregate import TopKCollector, fetch_stats
+from .ingest import micros_to_currency, safe_ratio, map_codes
+from .config import MATCH_TYPE_MAP, KEYWORD_MAX_ROWS
 
-def fetch_keyword_data(client: GoogleAdsClient, customer_id: str):
-    service = client.get_service("GoogleAdsService")
+if TYPE_CHECKING:  # annotation only; google.ads is slow to import
+    from google.ads.googleads.client import GoogleAdsClient
+
+KEYWORD_SCHEMA = {
+    "ad_group.name": object,
+    "ad_group_criterion.keyword.text": object,
+    "ad_group_criterion.keyword.match_type": "int32",
+    "ad_group_criterion.quality_info.quality_score": "int32",
+    "metrics.impressions": "int64",
+    "metrics.clicks": "int64",
+    "metrics.average_cpc": "float64",
+    "metrics.cost_micros": "int64",
+    "metrics.conversions": "float64",
+}
+
+def fetch_keyword_data(client: "GoogleAdsClient", customer_id: str):
     query = """
         SELECT ad_group.name, ad_group_criterion.keyword.text,
                ad_group_criterion.keyword.match_type,
@@ -16,42 +33,38 @@ def fetch_keyword_data(client: GoogleAdsClient, customer_id: str):
         AND ad_group.status = 'ENABLED'
         AND segments.date DURING LAST_30_DAYS
         AND metrics.impressions > 0
-        LIMIT 500
     """
     try:
-        response = service.search_stream(customer_id=customer_id, query=query)
+        collector = search_aggregate(
+            client, customer_id, query, KEYWORD_SCHEMA,
+            TopKCollector(KEYWORD_SCHEMA, "metrics.cost_micros", KEYWORD_MAX_ROWS)
+        )
     except Exception as e:
         print(f"❌ Error fetching keyword data: {e}")
         return pd.DataFrame()
 
-    data = []
-    for batch in response:
-        for row in batch.results:
-            cost = (row.metrics.cost_micros or 0) / 1e6
-            clicks = row.metrics.clicks or 0
-            impressions = row.metrics.impressions or 0
-            conversions = row.metrics.conversions or 0
-            cpa = cost / conversions if conversions else 0
-
-            data.append({
-                "Ad Group": row.ad_group.name,
-                "Keyword": row.ad_group_criterion.keyword.text,
-                "Match Type": MATCH_TYPE_MAP.get(row.ad_group_criterion.keyword.match_type, "UNKNOWN"),
-                "Quality Score": row.ad_group_criterion.quality_info.quality_score,
-                "Impressions": impressions,
-                "Clicks": clicks,
-                "CTR": clicks / impressions if impressions else 0,
-                "Avg CPC": (row.metrics.average_cpc or 0) / 1e6,
-                "Cost ($)": cost,
-                "Conversions": conversions,
-                "CPA ($)": cpa,
-                "CVR": conversions / clicks if clicks else 0  # <-- added here
-            })
-
-    df = pd.DataFrame(data)
-
-    # Ensure CVR column exists even if data is empty
-    if "CVR" not in df.columns:
-        df["CVR"] = 0
+    cols = collector.result()
+    if collector.truncated:
+        print(f"ℹ️ Keywords: kept top {KEYWORD_MAX_ROWS:,} of {collector.rows_seen:,} rows by cost")
+    cost = micros_to_currency(cols["metrics.cost_micros"])
+    clicks = cols["metrics.clicks"]
+    impressions = cols["metrics.impressions"]
+    conversions = cols["metrics.conversions"]
 
+    # CVR is always present, even when there are no rows
+    df = pd.DataFrame({
+        "Ad Group": cols["ad_group.name"],
+        "Keyword": cols["ad_group_criterion.keyword.text"],
+        "Match Type": map_codes(cols["ad_group_criterion.keyword.match_type"], MATCH_TYPE_MAP),
+        "Quality Score": cols["ad_group_criterion.quality_info.quality_score"],
+        "Impressions": impressions,
+        "Clicks": clicks,
+        "CTR": safe_ratio(clicks, impressions),
+        "Avg CPC": micros_to_currency(cols["metrics.average_cpc"]),
+        "Cost ($)": cost,
+        "Conversions": conversions,
+        "CPA ($)": safe_ratio(cost, conversions),
+        "CVR": safe_ratio(conversions, clicks)
+    })
+    df.attrs["fetch_stats"] = fetch_stats(collector, len(df))
     return df
@@ -1,9 +1,22 @@
+from typing import TYPE_CHECKING
 import pandas as pd
 from .utils_web import normalize_url
-from google.ads.googleads.client import GoogleAdsClient
+from .gaql_cache import search_aggregate
+from .aggregate import GroupSum, fetch_stats
+from .ingest import micros_to_currency
 
-def fetch_landing_page_data(client: GoogleAdsClient, customer_id: str):
-    service = client.get_service("GoogleAdsService")
+if TYPE_CHECKING:  # annotation only; google.ads is slow to import
+    from google.ads.googleads.client import GoogleAdsClient
+
+LANDING_PAGE_SCHEMA = {
+    "landing_page_view.unexpanded_final_url": object,
+    "metrics.impressions": "int64",
+    "metrics.clicks": "int64",
+    "metrics.conversions": "float64",
+    "metrics.cost_micros": "int64",
+}
+
+def fetch_landing_page_data(client: "GoogleAdsClient", customer_id: str):
     query = """
         SELECT 
           landing_page_view.unexpanded_final_url,
@@ -16,39 +29,32 @@ def fetch_landing_page_data(client: GoogleAdsClient, customer_id: str):
         FROM landing_page_view
         WHERE segments.date DURING LAST_30_DAYS
         AND metrics.impressions > 0
-        LIMIT 500
     """
+    accumulator = GroupSum(
+        "landing_page_view.unexpanded_final_url",
+        ["metrics.impressions", "metrics.clicks", "metrics.conversions", "metrics.cost_micros"],
+        key_fn=normalize_url
+    )
     try:
-        response = service.search_stream(customer_id=customer_id, query=query)
+        search_aggregate(client, customer_id, query, LANDING_PAGE_SCHEMA, accumulator)
     except Exception as e:
         print(f"❌ Error fetching landing page data: {e}")
         return pd.DataFrame()
 
-    data = []
-    for batch in response:
-        for row in batch.results:
-            url = row.landing_page_view.unexpanded_final_url
-            cost = row.metrics.cost_micros / 1e6 if row.metrics.cost_micros else 0
-            conversions = row.metrics.conversions or 0
-            clicks = row.metrics.clicks or 0
-            impressions = row.metrics.impressions or 0
-            data.append({
-                "Final URL": url,
-                "Impressions": impressions,
-                "Clicks": clicks,
-                "Conversions": conversions,
-                "Cost ($)": cost
-            })
-
-    if not data:
+    # Already summed per normalized URL while streaming
+    sums = accumulator.result()
+    if len(sums["landing_page_view.unexpanded_final_url"]) == 0:
         return pd.DataFrame()
 
-    df = pd.DataFrame(data)
-    df["Normalized URL"] = df["Final URL"].apply(normalize_url)
-    agg_cols = ["Impressions", "Clicks", "Conversions", "Cost ($)"]
-    df = df.groupby("Normalized URL", as_index=False)[agg_cols].sum()
+    df = pd.DataFrame({
+        "Final URL": sums["landing_page_view.unexpanded_final_url"],
+        "Impressions": sums["metrics.impressions"].astype("int64"),
+        "Clicks": sums["metrics.clicks"].astype("int64"),
+        "Conversions": sums["metrics.conversions"],
+        "Cost ($)": micros_to_currency(sums["metrics.cost_micros"])
+    }).sort_values("Final URL", ignore_index=True)
     df["CTR"] = df["Clicks"] / df["Impressions"].replace(0, 1)
     df["CPA ($)"] = df["Cost ($)"] / df["Conversions"].replace(0, 1)
     df["Avg CPC"] = df["Cost ($)"] / df["Clicks"].replace(0, 1)
-    df = df.rename(columns={"Normalized URL": "Final URL"})
+    df.attrs["fetch_stats"] = fetch_stats(accumulator, len(df))
     return df
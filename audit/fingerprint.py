@@ -0,0 +1,74 @@
+import os
+import re
+import numpy as np
+from pandas.util import hash_array
+
+# === Near-Duplicate Detection Config ===
+MINHASH_PERMUTATIONS = 128
+MINHASH_SHINGLE_WORDS = 3
+MINHASH_MIN_WORDS = 50  # shorter pages are too small to fingerprint reliably
+# Estimated Jaccard similarity of word shingles above which two pages count as the same template
+# (one word in twenty changed still leaves ~0.75 of the 3-word shingles in common)
+DUPLICATE_SIMILARITY = float(os.getenv("LP_DUPLICATE_SIMILARITY", "0.7"))
+
+_WORD = re.compile(r"\w+")
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# Fixed seed: fingerprints are comparable across processes and runs
+_MASKS = np.random.default_rng(20240517).integers(0, 2**63, MINHASH_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+
+
+def _shingle_hashes(words):
+    """Distinct 64-bit hashes of the MINHASH_SHINGLE_WORDS-word shingles of words."""
+    # Deterministic (fixed-key) vectorized hash of every word
+    word_hashes = hash_array(np.array(words, dtype=object), categorize=True)
+    # Combine the word hashes of each window (order-sensitive; uint64 arithmetic wraps)
+    n = min(MINHASH_SHINGLE_WORDS, len(words))
+    hashes = np.zeros(len(words) - n + 1, dtype=np.uint64)
+    for offset in range(n):
+        hashes = hashes * _SHINGLE_MULTIPLIER + word_hashes[offset:len(words) - n + 1 + offset]
+    return np.unique(hashes)
+
+
+def minhash(text):
+    """
+    MinHash signature (MINHASH_PERMUTATIONS uint64 values) of the word shingles of
+    text, or None if the text is too short to compare.
+    """
+    words = _WORD.findall((text or "").lower())
+    if len(words) < MINHASH_MIN_WORDS:
+        return None
+    hashes = _shingle_hashes(words)
+    # XOR with a random mask permutes the (already uniform) 64-bit hash space
+    return (hashes[:, None] ^ _MASKS[None, :]).min(axis=0)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def cluster_near_duplicates(texts, threshold=DUPLICATE_SIMILARITY):
+    """
+    Group near-identical pages. texts is {key: text} in priority order; the first
+    page of each group is its representative. Returns {key: representative key}
+    (a page that matches nothing is its own representative).
+    """
+    rep_keys = []
+    rep_signatures = []  # a few hundred pages at most, so every page is compared against all groups at once
+    clusters = {}
+    for key, text in texts.items():
+        signature = minhash(text)
+        match = None
+        if signature is not None and rep_signatures:
+            scores = np.count_nonzero(np.vstack(rep_signatures) == signature, axis=1) / MINHASH_PERMUTATIONS
+            best = int(scores.argmax())
+            if scores[best] >= threshold:
+                match = rep_keys[best]
+        if match is None:
+            clusters[key] = key
+            if signature is not None:
+                rep_keys.append(key)
+                rep_signatures.append(signature)
+        else:
+            clusters[key] = match
+    return clusters
@@ -0,0 +1,109 @@
+import os
+import re
+import datetime
+import hashlib
+import numpy as np
+import msgspec
+from . import services
+from .cache_store import DiskCache, CACHE_DIR
+from .ingest import iter_column_chunks
+from .ads_api import search_stream_rows
+from .aggregate import ColumnCollector
+
+# === GAQL Cache Config ===
+GAQL_CACHE_ENABLED = os.getenv("GAQL_CACHE_ENABLED", "1") == "1"
+GAQL_CACHE_PATH = os.getenv("GAQL_CACHE_PATH", os.path.join(CACHE_DIR, "gaql.sqlite"))
+GAQL_CACHE_MAX_MB = int(os.getenv("GAQL_CACHE_MAX_MB", "512"))
+
+# Keys carry the resolved date window, so a day is the longest an entry can be useful.
+services.register("gaql_cache", lambda: DiskCache(GAQL_CACHE_PATH, 24 * 3600, GAQL_CACHE_MAX_MB * 1024 * 1024))
+
+
+def _get_cache():
+    return services.get("gaql_cache") if GAQL_CACHE_ENABLED else None
+
+
+def normalize_query(query):
+    return " ".join(query.split())
+
+
+def select_fields(query):
+    """Field paths of the SELECT clause, in order (e.g. ['campaign.id', 'metrics.clicks'])."""
+    match = re.search(r"\bSELECT\b(.*?)\bFROM\b", query, re.IGNORECASE | re.DOTALL)
+    if not match:
+        raise ValueError("GAQL query has no SELECT ... FROM clause")
+    return [f.strip() for f in match.group(1).split(",") if f.strip()]
+
+
+def resolve_date_window(query, today=None):
+    """
+    Turn the DURING literal of a query into concrete (start, end) dates for today, so
+    cache keys roll over when the window does. Queries without DURING resolve to today.
+    """
+    today = today or datetime.date.today()
+    match = re.search(r"\bDURING\s+(\w+)", query, re.IGNORECASE)
+    if not match:
+        return today.isoformat(), today.isoformat()
+    literal = match.group(1).upper()
+    yesterday = today - datetime.timedelta(days=1)
+    first_of_month = today.replace(day=1)
+    days = re.fullmatch(r"LAST_(\d+)_DAYS", literal)
+    if days:
+        start, end = today - datetime.timedelta(days=int(days.group(1))), yesterday
+    elif literal == "TODAY":
+        start, end = today, today
+    elif literal == "YESTERDAY":
+        start, end = yesterday, yesterday
+    elif literal == "THIS_MONTH":
+        start, end = first_of_month, today
+    elif literal == "LAST_MONTH":
+        end = first_of_month - datetime.timedelta(days=1)
+        start = end.replace(day=1)
+    elif literal == "THIS_WEEK_SUN_TODAY":
+        start, end = today - datetime.timedelta(days=(today.weekday() + 1) % 7), today
+    elif literal == "THIS_WEEK_MON_TODAY":
+        start, end = today - datetime.timedelta(days=today.weekday()), today
+    else:
+        # LAST_WEEK_*, LAST_BUSINESS_WEEK, ...: key on today, which is at least as fresh.
+        start, end = today, today
+    return start.isoformat(), end.isoformat()
+
+
+def cache_key(customer_id, login_customer_id, query, today=None, variant=""):
+    start, end = resolve_date_window(query, today)
+    raw = "|".join([str(customer_id), str(login_customer_id or ""), normalize_query(query), start, end, variant])
+    return "gaql:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def search_aggregate(client, customer_id, query, schema, accumulator):
+    """
+    Stream every row of a GAQL query through accumulator (see audit.aggregate) in
+    column chunks, so memory stays bounded by the accumulator and not by the account
+    size. The accumulator's summary is cached per (customer, login customer, query,
+    date window) and restored into it on a hit. Returns the accumulator.
+    """
+    missing = [f for f in schema if f not in select_fields(query)]
+    if missing:
+        raise ValueError(f"Schema fields not selected by query: {missing}")
+    cache = _get_cache()
+    layout = ",".join(f"{f}:{np.dtype(dtype).str}" for f, dtype in schema.items())
+    variant = f"{layout}|{accumulator.cache_tag()}"
+    key = cache_key(customer_id, getattr(client, "login_customer_id", None), query, variant=variant)
+
+    if cache is not None:
+        blob = cache.get(key)
+        if blob is not None:
+            accumulator.load(msgspec.msgpack.decode(blob))
+            return accumulator
+
+    # Rate-limited, retried and resumed by the shared Google Ads call layer
+    for columns in iter_column_chunks(search_stream_rows(client, customer_id, query), schema):
+        accumulator.add(columns)
+    if cache is not None:
+        cache.set(key, msgspec.msgpack.encode(accumulator.dump()))
+    return accumulator
+
+
+def search_columns(client, customer_id, query, schema):
+    """All rows of a GAQL query as typed columns (dict of field path -> NumPy array)."""
+    return search_aggregate(client, customer_id, query, schema, ColumnCollector(schema)).result()
@@ -0,0 +1,75 @@
+import os
+import hashlib
+from .cache_store import DiskCache, CACHE_DIR
+
+# === Gemini Cache Config ===
+GEMINI_CACHE_ENABLED = os.getenv("GEMINI_CACHE_ENABLED", "1") == "1"
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", os.path.join(CACHE_DIR, "gemini.sqlite"))
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600)))
+GEMINI_CACHE_MAX_MB = int(os.getenv("GEMINI_CACHE_MAX_MB", "256"))
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so cosmetic prompt edits (indentation, blank lines) share an entry."""
+    return " ".join(str(prompt).split())
+
+
+def prompt_key(model_name, prompt):
+    digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class CachedResponse:
+    """Stand-in for a Gemini response when the text comes from the cache."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CachedModel:
+    """
+    Wraps a GenerativeModel so generate_content(prompt) is served from a disk cache
+    keyed by model name + normalized prompt hash. Anything else is delegated untouched.
+    """
+
+    def __init__(self, model, model_name, cache):
+        self._model = model
+        self._model_name = model_name
+        self._cache = cache
+
+    def generate_content(self, prompt, deadline=None, **kwargs):
+        # deadline only bounds the call to Gemini (see gemini_client), it doesn't change the answer
+        if deadline is not None:
+            kwargs["deadline"] = deadline
+        # Only plain text prompts with default settings are cacheable.
+        if self._cache is None or set(kwargs) - {"deadline"} or not isinstance(prompt, str):
+            return self._model.generate_content(prompt, **kwargs)
+
+        key = prompt_key(self._model_name, prompt)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return CachedResponse(cached.decode("utf-8"))
+
+        response = self._model.generate_content(prompt, **kwargs)
+        try:
+            text = response.text
+        except Exception:
+            # Blocked / empty candidates: don't cache, let the caller see the original response.
+            return response
+        if text and text.strip():
+            self._cache.set(key, text.encode("utf-8"))
+        return response
+
+    def cache_stats(self):
+        return self._cache.stats() if self._cache is not None else {}
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def cached_model(model, model_name):
+    """Return model wrapped with the shared Gemini response cache (or as-is when disabled)."""
+    if not GEMINI_CACHE_ENABLED:
+        return model
+    cache = DiskCache(GEMINI_CACHE_PATH, GEMINI_CACHE_TTL, GEMINI_CACHE_MAX_MB * 1024 * 1024)
+    return CachedModel(model, model_name, cache)
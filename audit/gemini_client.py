@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+from .rate_limit import TokenBucket, backoff_delay
+
+# === Gemini Rate Limit Config ===
+# One limiter per process, shared by every report and thread that calls Gemini.
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "300"))                   # request rate ceiling (token bucket)
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "16"))
+GEMINI_MIN_CONCURRENCY = 1
+GEMINI_INITIAL_CONCURRENCY = int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "4"))
+GEMINI_LATENCY_TARGET = float(os.getenv("GEMINI_LATENCY_TARGET", "30"))  # slower calls count as congestion
+GEMINI_CALL_DEADLINE = float(os.getenv("GEMINI_CALL_DEADLINE", "120"))   # per call, retries included
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_BACKOFF_BASE = 1.0
+GEMINI_BACKOFF_CAP = 30.0
+
+# google.api_core exception codes worth retrying: rate limited, server error, unavailable, timeout
+RETRYABLE_CODES = {429, 500, 503, 504}
+THROTTLE_CODES = {429}
+
+
+def _error_code(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    if isinstance(error, TimeoutError):
+        return 504
+    if isinstance(error, ConnectionError):
+        return 503
+    return None
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on in-flight calls: grows by about one per limit's worth of successful
+    calls, halves on a 429 or a call slower than GEMINI_LATENCY_TARGET (at most once
+    per call duration, so one burst of throttled calls counts as a single signal).
+    """
+
+    def __init__(self, initial, minimum, maximum):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Gemini concurrency limit: no slot before the deadline")
+                self._cond.wait(remaining)
+            self.in_flight += 1
+
+    def release(self, latency, congested):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if congested or latency > GEMINI_LATENCY_TARGET:
+                if now - self._last_decrease > latency:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    print(f"⚠️ Gemini congestion; concurrency limit -> {int(self.limit)}")
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class RateLimitedModel:
+    """
+    Wraps a GenerativeModel so every generate_content call goes through the shared
+    token bucket and adaptive concurrency limit, and transient failures (429, 5xx,
+    timeouts) are retried with jittered exponential backoff until the call's
+    deadline. Anything else is delegated untouched.
+    """
+
+    def __init__(self, model, rpm=GEMINI_RPM, burst=GEMINI_BURST):
+        self._model = model
+        self._bucket = TokenBucket(rpm / 60.0, burst, "Gemini rate limit")
+        self._concurrency = AdaptiveConcurrency(GEMINI_INITIAL_CONCURRENCY, GEMINI_MIN_CONCURRENCY, GEMINI_MAX_CONCURRENCY)
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def generate_content(self, prompt, deadline=None, **kwargs):
+        """deadline is a time.monotonic() value; by default GEMINI_CALL_DEADLINE from now."""
+        if deadline is None:
+            deadline = time.monotonic() + GEMINI_CALL_DEADLINE
+        self._count("calls")
+        options = dict(kwargs.pop("request_options", None) or {})
+        attempt = 0
+        while True:
+            if time.monotonic() >= deadline:
+                raise TimeoutError("Gemini call deadline passed")
+            self._bucket.acquire(deadline)
+            self._concurrency.acquire(deadline)
+            start = time.monotonic()
+            code = None
+            try:
+                # The HTTP request itself may not outlive the deadline either
+                timeout = max(1.0, deadline - start)
+                return self._model.generate_content(
+                    prompt, request_options={"timeout": timeout, **options}, **kwargs
+                )
+            except Exception as e:
+                code = _error_code(e)
+                if code in THROTTLE_CODES:
+                    self._count("throttled")
+                backoff = backoff_delay(attempt, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_CAP)
+                if code not in RETRYABLE_CODES or attempt >= GEMINI_MAX_RETRIES \
+                        or time.monotonic() + backoff >= deadline:
+                    self._count("failed")
+                    raise
+                error = e
+            finally:
+                self._concurrency.release(time.monotonic() - start, code in THROTTLE_CODES)
+            attempt += 1
+            self._count("retries")
+            print(f"⚠️ Gemini call failed ({error}); retry {attempt}/{GEMINI_MAX_RETRIES} in {backoff:.1f}s")
+            time.sleep(backoff)
+
+    def rate_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = int(self._concurrency.limit)
+        stats["in_flight"] = self._concurrency.in_flight
+        return stats
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
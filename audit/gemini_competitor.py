@@ -1,19 +1,51 @@
 import json
-import time
-import subprocess
 import re
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from .config import CHROME_PATH, USER_DATA_DIR, DEBUGGING_PORT, model, LANGUAGE, DEVICE, GEO_LOOKUP_DF, client, CUSTOMER_ID
-from .utils_web import fetch_page_text
+from concurrent.futures import ThreadPoolExecutor
+from .config import LANGUAGE, DEVICE, client, CUSTOMER_ID
+from .utils_web import fetch_page_text, resolve_geo_frame
+from .ads_api import search_stream_rows
+from . import services
+from .browser_pool import CDP_MAX_TABS, PAGE_LOAD_TIMEOUT, navigate_and_wait
+from .serp_cache import SerpResult, get_serp, set_serp
 import pandas as pd
 
-try:
-    import pychrome
-    from playwright.sync_api import sync_playwright
-except Exception:
-    pychrome = None
-    sync_playwright = None
+_SCRAPE_ADS_JS = """
+(() => {
+    const results = [];
+    const blocks = document.querySelectorAll('#rso > div');
+    for (let i = 0; i < Math.min(3, blocks.length); i++) {
+        const block = blocks[i];
+        let titleEl = block.querySelector('a > h3');
+        let title = titleEl ? titleEl.innerText.trim() : "";
+        let urlEl = block.querySelector('cite');
+        let domainUrl = urlEl ? urlEl.innerText.trim() : "";
+        let domainName = domainUrl
+            .replace(/^https?:\\/\\//, '')
+            .replace(/^www\\./, '')
+            .split(/[\\/\\?]/)[0];
+        let adCopyEl = block.querySelector('div:nth-child(2) > div > span');
+        let adCopy = adCopyEl ? adCopyEl.innerText.trim() : "";
+        results.push({
+            Name: domainName,
+            URL: domainUrl,
+            "Title": title,
+            "Ad Copy": adCopy
+        });
+    }
+    return JSON.stringify(results);
+})();
+"""
+
+
+def _load_browser_libs():
+    """pychrome / Playwright are optional and slow to import: load them per run, not at startup."""
+    try:
+        import pychrome
+        from playwright.sync_api import sync_playwright
+    except Exception:
+        return None, None
+    return pychrome, sync_playwright
 
 
 def safe_parse_gemini_json(raw_text):
@@ -35,7 +67,6 @@ def safe_parse_gemini_json(raw_text):
 
 
 def detect_primary_location(google_ads_client, CUSTOMER_ID):
-    ga_service = google_ads_client.get_service("GoogleAdsService")
     query = """
         SELECT
           campaign_criterion.criterion_id
@@ -45,10 +76,8 @@ def detect_primary_location(google_ads_client, CUSTOMER_ID):
     """
     location_ids = []
     try:
-        response = ga_service.search_stream(customer_id= CUSTOMER_ID, query=query)
-        for batch in response:
-            for row in batch.results:
-                location_ids.append(int(row.campaign_criterion.criterion_id))
+        for row in search_stream_rows(google_ads_client, CUSTOMER_ID, query):
+            location_ids.append(int(row.campaign_criterion.criterion_id))
     except Exception as e:
         print(f"⚠️ Error fetching campaign locations: {e}")
         return "United States"
@@ -56,158 +85,125 @@ def detect_primary_location(google_ads_client, CUSTOMER_ID):
     if not location_ids:
         return "United States"
 
-    matches = GEO_LOOKUP_DF.loc[
-        GEO_LOOKUP_DF.index.intersection(location_ids),
-        ["Name", "Target Type"]
-    ]
+    matches = resolve_geo_frame(sorted(set(location_ids)))
+    matches = matches[matches["found"]]
     if matches.empty:
         return "United States"
-    city_region = matches[matches["Target Type"].isin(["City", "Region"])]
+    city_region = matches[matches["target_type"].isin(["City", "Region"])]
     if not city_region.empty:
-        return city_region.iloc[0]["Name"]
-    return matches.iloc[0]["Name"]
+        return city_region.iloc[0]["name"]
+    return matches.iloc[0]["name"]
 
 
-def generate_competitor_insights(kw_df, lp_df, site_url, genai_model):
-    if kw_df is None or lp_df is None:
-        return None
+# Ad Preview UI waits (ms): each step waits for the element or network quiet it needs
+PREVIEW_STEP_TIMEOUT = 5000
+PREVIEW_SETTLE_TIMEOUT = 3000
 
-    primary_location = detect_primary_location(client, CUSTOMER_ID)
-    print(f"📍 Using campaign location: {primary_location}")
 
-    # --- Launch background Chrome for pychrome ---
-    def launch_chrome():
+def _settle(page):
+    """Wait for the Ad Preview to finish the requests a setting change triggers."""
+    try:
+        page.wait_for_load_state("networkidle", timeout=PREVIEW_SETTLE_TIMEOUT)
+    except Exception:
+        pass
+
+
+def get_iframe_urls_for_keyword(page, keyword, primary_location):
+    """
+    Ad Preview iframe URLs for keyword; runs on a browser_pool page. Returns
+    (iframe_urls, filtered): iframe_urls is None if the preview did not load, and
+    filtered is False if the location, language or device could not be applied (the
+    URLs then show the default SERP and must not be cached under those settings).
+    """
+    print(f"🔍 Looking for iframe URLs for keyword: {keyword}")
+    filtered = True
+    try:
+        page.goto("https://ads.google.com/anon/AdPreview", timeout=15000)
+        page.fill("input[aria-label='Enter a search term']", keyword)
+        page.keyboard.press("Enter")
+        location_button = page.locator("button[aria-label='Select location']")
+        location_button.wait_for(state="visible", timeout=PREVIEW_STEP_TIMEOUT)
+
+        # Apply location
         try:
-            subprocess.Popen([
-                CHROME_PATH,
-                f"--remote-debugging-port={DEBUGGING_PORT}",
-                f"--user-data-dir={USER_DATA_DIR}",
-                "--no-first-run",
-                "--no-default-browser-check",
-                "--headless",
-                "--no-sandbox",
-                "--disable-gpu",
-                "--disable-dev-shm-usage"
-            ])
-            time.sleep(4)
+            location_button.click()
+            location_input = page.get_by_label("Enter a location to include")
+            location_input.click()
+            location_input.fill(primary_location)
+            suggestion = page.locator("div.list-dynamic-item.active").first
+            suggestion.wait_for(state="visible", timeout=PREVIEW_STEP_TIMEOUT)
+            suggestion.click()
+            _settle(page)
         except Exception as e:
-            print("⚠️ Could not launch local Chrome for pychrome:", e)
+            print(f"⚠️ Could not set location {primary_location} for {keyword}: {e}")
+            filtered = False
 
-    # --- Get iframe URLs using Playwright ---
-    def get_iframe_urls_for_keyword(keyword):
+        # Language
+        try:
+            page.locator("div.button:has(span.label-text:has-text('Language'))").click()
+            page.wait_for_selector("material-select-searchbox material-input input")
+            page.locator("material-select-searchbox material-input input").first.fill(LANGUAGE)
+            option = page.locator("material-select-dropdown-item span.label").first
+            option.wait_for(state="visible", timeout=PREVIEW_STEP_TIMEOUT)
+            option.click()
+        except Exception as e:
+            print(f"⚠️ Could not set language {LANGUAGE} for {keyword}: {e}")
+            filtered = False
+
+        # Device
+        try:
+            page.locator("span.button-text", has_text="Mobile").click()
+            option = page.locator(f"material-select-dropdown-item span.label:has-text('{DEVICE}')")
+            option.wait_for(state="visible", timeout=PREVIEW_STEP_TIMEOUT)
+            option.click()
+            _settle(page)
+        except Exception as e:
+            print(f"⚠️ Could not set device {DEVICE} for {keyword}: {e}")
+            filtered = False
+
+        # Collect iframes
+        page.wait_for_selector("iframe.iframe-preview", timeout=8000)
         iframe_urls = []
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-dev-shm-usage",
-                    "--disable-gpu",
-                    "--disable-background-networking",
-                    "--disable-software-rasterizer"
-                ]
-            )
-            context = browser.new_context()
-            page = context.new_page()
-            print(f"🔍 Looking for iframe URLs for keyword: {keyword}")
-            try:
-                page.goto("https://ads.google.com/anon/AdPreview", timeout=15000)
-                page.fill("input[aria-label='Enter a search term']", keyword)
-                page.keyboard.press("Enter")
-                time.sleep(3)
-
-                # Apply location
-                try:
-                    page.locator("button[aria-label='Select location']").click()
-                    location_input = page.get_by_label("Enter a location to include")
-                    location_input.click()
-                    location_input.fill(primary_location)
-                    time.sleep(1)
-                    page.locator("div.list-dynamic-item.active").first.click()
-                    time.sleep(1.5)
-                except:
-                    pass
-
-                # Language
-                try:
-                    page.locator("div.button:has(span.label-text:has-text('Language'))").click()
-                    page.wait_for_selector("material-select-searchbox material-input input")
-                    page.locator("material-select-searchbox material-input input").first.fill(LANGUAGE)
-                    time.sleep(1)
-                    page.locator("material-select-dropdown-item span.label").first.click()
-                except:
-                    pass
-
-                # Device
-                try:
-                    page.locator("span.button-text", has_text="Mobile").click()
-                    time.sleep(1)
-                    page.locator(f"material-select-dropdown-item span.label:has-text('{DEVICE}')").click()
-                    time.sleep(1.5)
-                except:
-                    pass
-
-                # Collect iframes
-                page.wait_for_selector("iframe.iframe-preview", timeout=8000)
-                iframe_elements = page.query_selector_all("iframe.iframe-preview")
-                for iframe in iframe_elements:
-                    src = iframe.get_attribute("src")
-                    if src and src.startswith("http"):
-                        iframe_urls.append(src)
+        for iframe in page.query_selector_all("iframe.iframe-preview"):
+            src = iframe.get_attribute("src")
+            if src and src.startswith("http"):
+                iframe_urls.append(src)
+        return iframe_urls, filtered
+
+    except Exception as e:
+        print(f"⚠️ Error in Playwright for {keyword}: {e}")
+        return None, False
 
-            except Exception as e:
-                print(f"⚠️ Error in Playwright for {keyword}: {e}")
-            finally:
-                browser.close()
-        return iframe_urls
+
+def generate_competitor_insights(kw_df, lp_df, site_url, genai_model, google_ads_client=None, customer_id=None):
+    if kw_df is None or lp_df is None:
+        return None
+
+    pychrome, sync_playwright = _load_browser_libs()
+    # The report's own account; the env-configured client/customer only as a fallback
+    if google_ads_client is None:
+        google_ads_client, customer_id = client, customer_id or CUSTOMER_ID
+    primary_location = detect_primary_location(google_ads_client, customer_id or CUSTOMER_ID)
+    print(f"📍 Using campaign location: {primary_location}")
 
     # --- Scrape ads via pychrome ---
     def scrape_ads(iframe_url):
+        """Ads on an Ad Preview iframe; None if the scrape failed (so it isn't cached)."""
         if pychrome is None:
-            return []
+            return None
         try:
-            browser = pychrome.Browser(url=f"http://127.0.0.1:{DEBUGGING_PORT}")
-            tabs = browser.list_tab()
-            if not tabs:
-                print("⚠️ No tabs found in Chrome debugger")
-                return []
-            tab = tabs[0]
-            tab.start()
-            tab.call_method("Page.enable")
-            tab.call_method("Runtime.enable")
-            tab.call_method("Page.navigate", url=iframe_url)
-            time.sleep(5)
-            js = """
-            (() => {
-                const results = [];
-                const blocks = document.querySelectorAll('#rso > div');
-                for (let i = 0; i < Math.min(3, blocks.length); i++) {
-                    const block = blocks[i];
-                    let titleEl = block.querySelector('a > h3');
-                    let title = titleEl ? titleEl.innerText.trim() : "";
-                    let urlEl = block.querySelector('cite');
-                    let domainUrl = urlEl ? urlEl.innerText.trim() : "";
-                    let domainName = domainUrl
-                        .replace(/^https?:\\/\\//, '')
-                        .replace(/^www\\./, '')
-                        .split(/[\\/\\?]/)[0];
-                    let adCopyEl = block.querySelector('div:nth-child(2) > div > span');
-                    let adCopy = adCopyEl ? adCopyEl.innerText.trim() : "";
-                    results.push({
-                        Name: domainName,
-                        URL: domainUrl,
-                        "Title": title,
-                        "Ad Copy": adCopy
-                    });
-                }
-                return JSON.stringify(results);
-            })();
-            """
-            result = tab.call_method("Runtime.evaluate", expression=js, returnByValue=True)
-            return json.loads(result["result"]["value"])
+            with services.get("cdp_tabs").lease() as tab:
+                tab.call_method("Runtime.enable")
+                loaded = navigate_and_wait(tab, iframe_url)
+                if not loaded:
+                    print(f"⚠️ Ad preview did not finish loading in {PAGE_LOAD_TIMEOUT}s; scraping what is there")
+                result = tab.call_method("Runtime.evaluate", expression=_SCRAPE_ADS_JS, returnByValue=True)
+            ads = json.loads(result["result"]["value"])
+            # No ads on a page that never finished loading is a failure, not an empty SERP
+            return ads if ads or loaded else None
         except Exception as e:
             print("⚠️ pychrome scrape error:", e)
-            return []
+            return None
 
     # --- Summarize competitor with Gemini ---
     def summarize_competitor(name, ads, lp_text):
@@ -244,25 +240,60 @@ Avoid markdown. Only return valid JSON array.
     best_lp = lp_df.sort_values("Conversions", ascending=False)["Final URL"].iloc[0] if not lp_df.empty else site_url
     lp_text = fetch_page_text(best_lp)
 
-    launch_chrome()
     competitor_ads = defaultdict(list)
-
-    # ✅ SEQUENTIAL loop (no threads)
-    for keyword in top_keywords["Keyword"]:
-        iframe_urls = get_iframe_urls_for_keyword(keyword)[:2]
-        for iframe_url in iframe_urls:
-            ads = scrape_ads(iframe_url)
-            own_domain = site_url.replace("https://", "").replace("http://", "").replace("www.", "").split("/")[0].lower()
-            for ad in ads:
-                ad_domain = ad["Name"].lower()
-                if ad_domain != own_domain and ad_domain != "unknown":
-                    ad["Keyword"] = keyword
-                    competitor_ads[ad["Name"]].append(ad)
+    own_domain = site_url.replace("https://", "").replace("http://", "").replace("www.", "").split("/")[0].lower()
+
+    # Ad Preview results are shared across audits by (keyword, location, language, device);
+    # cached keywords never touch a browser
+    keywords = list(top_keywords["Keyword"])
+    serps = {keyword: get_serp(keyword, primary_location, LANGUAGE, DEVICE) for keyword in keywords}
+    misses = [keyword for keyword in keywords if serps[keyword] is None]
+    if keywords:
+        print(f"ℹ️ SERP cache: {len(keywords) - len(misses)}/{len(keywords)} keywords cached")
+    if misses and sync_playwright is None:
+        print("⚠️ Playwright is not installed; skipping competitor ad preview for uncached keywords")
+        misses = []
+
+    # Uncached keywords go through the shared browser pool in parallel (BROWSER_POOL_SIZE
+    # wide) and each iframe is scraped in its own debugger tab as soon as its keyword is
+    # done; results are consumed in keyword order so the report stays deterministic
+    pool = services.get("browser_pool") if misses else None
+    futures = {keyword: pool.submit(get_iframe_urls_for_keyword, keyword, primary_location) for keyword in misses}
+    scrapes = {}
+    with ThreadPoolExecutor(max_workers=CDP_MAX_TABS) as executor:
+        for keyword in misses:
+            try:
+                iframe_urls, filtered = futures[keyword].result()
+            except Exception as e:
+                print(f"⚠️ Browser pool error for {keyword}: {e}")
+                continue
+            if iframe_urls is None:
+                continue
+            iframe_urls = iframe_urls[:2]
+            scrapes[keyword] = (iframe_urls, filtered, [executor.submit(scrape_ads, iframe_url) for iframe_url in iframe_urls])
+        for keyword in keywords:
+            if keyword in scrapes:
+                iframe_urls, filtered, pending = scrapes[keyword]
+                scraped = [scrape.result() for scrape in pending]
+                serps[keyword] = SerpResult(iframe_urls=iframe_urls, ads=[ads or [] for ads in scraped])
+                # Only a fully loaded, fully filtered preview is a result worth sharing
+                if filtered and all(ads is not None for ads in scraped):
+                    set_serp(keyword, primary_location, LANGUAGE, DEVICE, serps[keyword])
+            if serps[keyword] is None:
+                continue
+            for ads in serps[keyword].ads:
+                for ad in ads:
+                    ad_domain = ad["Name"].lower()
+                    if ad_domain != own_domain and ad_domain != "unknown":
+                        competitor_ads[ad["Name"]].append(dict(ad, Keyword=keyword))
 
     # --- Summaries ---
     summary = []
-    for name, ads in competitor_ads.items():
-        summary.append(summarize_competitor(name, ads, lp_text))
+    if competitor_ads:
+        with ThreadPoolExecutor(max_workers=min(5, len(competitor_ads))) as executor:
+            summary = list(executor.map(
+                lambda item: summarize_competitor(item[0], item[1], lp_text), competitor_ads.items()
+            ))
 
     result_df = []
     for row in summary:
@@ -2,8 +2,8 @@ from .utils_text import clean
 from .config import model
 import json
 
-def gemini_hourly_summary(df):
-    if df is None or df.empty:
+def gemini_hourly_summary(hourly_cube):
+    if hourly_cube is None or hourly_cube.empty:
         return "[]"
 
     prompt = f"""
@@ -18,8 +18,8 @@ Rules:
 - Keep each value as a single string.
 - Only include meaningful, actionable rows.
 
-Data:
-{df.to_string(index=False)}
+Data (CVR = conversions / clicks, recomputed per cell and total):
+{hourly_cube.prompt_table()}
 """
 
     try:
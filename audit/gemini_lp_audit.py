@@ -1,11 +1,35 @@
+import os
 import json
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from .config import model
-from .utils_web import fetch_page_text
-from .utils_text import clean, parse_json_insight_to_table, parse_and_repair
+from .utils_web import fetch_pages_text
+from .fingerprint import cluster_near_duplicates
+from .lp_priority import (
+    LP_AUDIT_MAX_PAGES, LP_AUDIT_FETCH_PAGES, LP_AUDIT_TIME_BUDGET, LP_AUDIT_TOKEN_BUDGET,
+    SKIP_NOT_RANKED, SKIP_PAGE_LIMIT, SKIP_TOKEN_BUDGET, SKIP_TIME_BUDGET, SKIP_FETCH_FAILED,
+    SKIP_AUDIT_FAILED, SKIP_NO_FINDINGS,
+    rank_landing_pages, skipped_pages_table,
+)
+from .utils_text import clean, parse_json_insight_to_table, parse_and_repair, dedupe_insight_rows
+from . import services
 import pandas as pd
 
+# === LP Audit Concurrency ===
+# Chunk prompts of every page being audited share one pool, so a long page costs about
+# one Gemini round trip instead of one per chunk, without multiplying the number of
+# in-flight calls by the number of pages.
+LP_CHUNK_CONCURRENCY = int(os.getenv("LP_CHUNK_CONCURRENCY", "8"))
+LP_DEDUP_SIMILARITY = float(os.getenv("LP_DEDUP_SIMILARITY", "0.6"))
+LP_CHUNK_SIZE = 3000
+LP_PROMPT_OVERHEAD_CHARS = 1200  # instructions + metrics around each chunk
+CHARS_PER_TOKEN = 4
+
+services.register(
+    "lp_chunk_pool",
+    lambda: ThreadPoolExecutor(max_workers=LP_CHUNK_CONCURRENCY, thread_name_prefix="lp-chunk"),
+)
+
 # --------------------------
 # Helpers
 # --------------------------
@@ -21,10 +45,17 @@ def chunk_text(text, chunk_size=3000, overlap=200):
         start += chunk_size - overlap
     return chunks
 
-def audit_landing_page_with_gemini(url, html_text, metrics=None):
+def estimate_audit_tokens(html_text):
+    """Rough prompt tokens one page's audit will send (every chunk plus its instructions)."""
+    chunks = chunk_text(html_text.strip(), chunk_size=LP_CHUNK_SIZE)
+    return sum(len(c) + LP_PROMPT_OVERHEAD_CHARS for c in chunks) // CHARS_PER_TOKEN
+
+def audit_landing_page_with_gemini(url, html_text, metrics=None, deadline=None):
     """
     Runs a CRO/Google Ads landing page audit using Gemini.
-    Always returns valid JSON array.
+    Returns a JSON array ("[]" if there were no findings). Chunks not started by
+    deadline (time.monotonic()) are skipped; raises RuntimeError if every chunk that
+    was sent failed (API error or empty response).
     """
     # Prepare metrics snippet
     metric_note = ""
@@ -39,10 +70,9 @@ Keyword Performance:
 """
 
     # Break HTML/text into chunks
-    chunks = chunk_text(html_text.strip(), chunk_size=3000)
+    chunks = chunk_text(html_text.strip(), chunk_size=LP_CHUNK_SIZE)
 
-    all_rows = []
-    for i, chunk in enumerate(chunks, 1):
+    def audit_chunk(i, chunk):
         prompt = f"""
 You are a CRO and Google Ads landing page consultant.
 Audit the page at {url} using the performance data and HTML content.
@@ -62,60 +92,134 @@ Page Performance Data:
 Page Content (chunk {i}/{len(chunks)}):
 {chunk}
 """
+        if deadline is not None and time.monotonic() > deadline:
+            return []
         try:
-            raw = (model.generate_content(prompt).text or "").strip()
+            # Retries / rate-limit waits stop at the stage deadline too
+            raw = (model.generate_content(prompt, deadline=deadline).text or "").strip()
         except Exception as e:
             print(f"❌ Gemini LP audit API error for {url} (chunk {i}): {e}")
-            continue
+            return None
 
         if not raw:
             print(f"⚠️ Gemini returned empty for {url} (chunk {i})")
-            continue
+            return None
+
+        return parse_and_repair(raw) or []
 
-        rows = parse_and_repair(raw)
-        if rows:
-            all_rows.extend(rows)
+    # Map: all chunks at once on the shared pool; reduce: in chunk order, near-duplicates merged
+    pool = services.get("lp_chunk_pool")
+    futures = [pool.submit(audit_chunk, i, chunk) for i, chunk in enumerate(chunks, 1)]
+    chunk_rows = [future.result() for future in futures]
+    if chunk_rows and all(rows is None for rows in chunk_rows):
+        raise RuntimeError(f"Gemini could not audit any chunk of {url}")
+    all_rows = [row for rows in chunk_rows if rows for row in rows]
 
-    # Remove duplicates by tuple of values
-    seen = set()
-    unique_rows = []
-    for row in all_rows:
-        key = (row.get("Characteristic"), row.get("Insight"), row.get("Recommendation"))
-        if key not in seen:
-            seen.add(key)
-            row["URL"] = url  # Add URL to each row
-            unique_rows.append(row)
+    unique_rows = dedupe_insight_rows(all_rows, LP_DEDUP_SIMILARITY)
+    for row in unique_rows:
+        row["URL"] = url  # Add URL to each row
 
     return json.dumps(unique_rows, ensure_ascii=False)
 
+def attach_findings(audit_json, url):
+    """Findings of an audited page, re-labelled for a near-identical page."""
+    source_url = ""
+    rows = json.loads(audit_json)
+    for row in rows:
+        source_url = row.get("URL", source_url)
+        row["URL"] = url
+        row["Audited As"] = source_url
+    return json.dumps(rows, ensure_ascii=False)
+
 def run_landing_page_audits(df_lp, max_workers=5):
     """
-    Runs landing page audits in parallel for all rows in df_lp.
-    Returns a list of JSON strings with audit results.
+    Audits the landing pages in df_lp that matter most, within a budget.
+    Pages are ranked by share of spend and clicks and the top LP_AUDIT_FETCH_PAGES are
+    fetched. Near-identical pages (e.g. one template per location) are grouped by
+    content and only the highest-ranked page of each group is audited; its findings
+    are attached to the other members. Up to LP_AUDIT_MAX_PAGES distinct pages are
+    audited in rank order until LP_AUDIT_TOKEN_BUDGET (estimated prompt tokens) or
+    LP_AUDIT_TIME_BUDGET (seconds) runs out.
+    Returns (insights, skipped): a list of JSON strings with audit results, and a
+    DataFrame of the pages that were not audited, with the reason and a metrics summary.
     """
-    insights = []
-    if df_lp is None or df_lp.empty:
-        return insights
+    if df_lp is None or df_lp.empty or "Final URL" not in df_lp.columns:
+        return [], skipped_pages_table(None, {})
+
+    deadline = time.monotonic() + LP_AUDIT_TIME_BUDGET
+    ranked = rank_landing_pages(df_lp[df_lp["Final URL"].notna() & (df_lp["Final URL"] != "")])
+    candidates = ranked.head(LP_AUDIT_FETCH_PAGES)
+    skipped = {url: SKIP_NOT_RANKED for url in ranked["Final URL"].iloc[LP_AUDIT_FETCH_PAGES:]}
+
+    # Fetch the candidates up front: one batch over pooled, per-host-limited connections
+    # (unchanged pages come back from the HTTP cache after a 304)
+    page_texts = fetch_pages_text(candidates["Final URL"].tolist())
+    for url in candidates["Final URL"]:
+        if not page_texts.get(url):
+            skipped[url] = SKIP_FETCH_FAILED
+
+    # {url: url of the page audited on its behalf}, in priority order
+    clusters = cluster_near_duplicates(
+        {url: page_texts[url] for url in candidates["Final URL"] if url not in skipped}
+    )
+
+    # Admit one page per group, in priority order, while the page limit and the
+    # estimated prompt tokens allow
+    admitted = []
+    tokens = 0
+    for _, row in candidates.iterrows():
+        url = row["Final URL"]
+        if clusters.get(url) != url:
+            continue
+        if len(admitted) >= LP_AUDIT_MAX_PAGES:
+            skipped[url] = SKIP_PAGE_LIMIT
+            continue
+        cost = estimate_audit_tokens(page_texts[url])
+        if tokens + cost > LP_AUDIT_TOKEN_BUDGET:
+            skipped[url] = SKIP_TOKEN_BUDGET
+            continue
+        tokens += cost
+        admitted.append(row)
 
     def process_row(idx_row):
-        url = idx_row.get("Final URL", "")
-        if not url:
-            return None
-        html_text = fetch_page_text(url)
-        if not html_text:
-            return None
+        url = idx_row["Final URL"]
+        if time.monotonic() > deadline:
+            return url, None
         print(f"🔍 Auditing LP (parallel): {url}")
-        return audit_landing_page_with_gemini(url, html_text, idx_row)
+        result = audit_landing_page_with_gemini(url, page_texts[url], idx_row, deadline=deadline)
+        # Every chunk was past the deadline: nothing was audited
+        if result == "[]" and time.monotonic() > deadline:
+            return url, None
+        return url, result
 
-    rows = [row for _, row in df_lp.iterrows()]
+    results = {}
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_row, row): row for row in rows}
+        futures = {executor.submit(process_row, row): row["Final URL"] for row in admitted}
         for future in as_completed(futures):
+            url = futures[future]
             try:
-                result = future.result()
-                if isinstance(result, str) and result.strip():
-                    insights.append(result.strip())
+                _, result = future.result()
             except Exception as e:
-                print("⚠️ LP audit thread error:", e)
+                print(f"⚠️ LP audit failed for {url}: {e}")
+                skipped[url] = SKIP_AUDIT_FAILED
+                continue
+            result = result.strip() if isinstance(result, str) else result
+            if result is None:
+                skipped[url] = SKIP_TIME_BUDGET
+            elif not result:
+                skipped[url] = SKIP_AUDIT_FAILED
+            elif json.loads(result) == []:
+                skipped[url] = SKIP_NO_FINDINGS  # a valid audit that found nothing to report
+            else:
+                results[url] = result
 
-    return insights
+    # Highest-priority pages first in the report; near-duplicates carry their group's findings
+    insights = []
+    for url, representative in clusters.items():
+        if representative in skipped:
+            skipped[url] = skipped[representative]
+        elif representative in results:
+            insights.append(results[url] if url == representative else attach_findings(results[representative], url))
+    print(f"ℹ️ LP audit: {len(insights)} of {len(ranked)} pages covered by {len(admitted)} audits "
+          f"(~{tokens} prompt tokens), {len(skipped)} summarized from metrics")
+    return insights, skipped_pages_table(ranked, skipped)
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import mmap
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from .cache_store import CACHE_DIR
+
+# === Geo Index Config ===
+GEO_CSV_PATH = os.getenv("GEO_TARGETS_CSV", "geotargets-2025-07-15.csv")
+GEO_INDEX_DIR = os.getenv("GEO_INDEX_DIR", os.path.join(CACHE_DIR, "geo_index"))
+
+# String fields stored in the shared string table, as (index field, CSV column)
+STRING_FIELDS = [
+    ("name", "Name"),
+    ("canonical_name", "Canonical Name"),
+    ("target_type", "Target Type"),
+    ("country_code", "Country Code"),
+]
+
+RECORD_DTYPE = np.dtype(
+    [("criteria_id", "<i8"), ("parent_id", "<i8")]
+    + [(f"{field}_{part}", "<i8" if part == "off" else "<i4") for field, _ in STRING_FIELDS for part in ("off", "len")]
+)
+
+_lock = threading.Lock()
+_index = None
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {"csv": os.path.abspath(csv_path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def build_geo_index(csv_path=GEO_CSV_PATH, index_dir=GEO_INDEX_DIR):
+    """
+    Build the binary geo index from the Google geotargets CSV (active rows only):
+    - records.npy: criteria_id-sorted records with parent id and (offset, length)
+      pairs into the string table for each string field
+    - strings.bin: UTF-8 string table, each distinct string stored once
+    The directory is written to a temp location and renamed into place.
+    """
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df = df[df["Status"] == "Active"]
+    ids = pd.to_numeric(df["Criteria ID"], errors="coerce")
+    df = df[ids.notna()].assign(**{"Criteria ID": ids[ids.notna()].astype("int64")})
+    df = df.sort_values("Criteria ID").drop_duplicates("Criteria ID")
+
+    records = np.zeros(len(df), dtype=RECORD_DTYPE)
+    records["criteria_id"] = df["Criteria ID"].to_numpy()
+    records["parent_id"] = pd.to_numeric(df["Parent ID"], errors="coerce").fillna(0).astype("int64").to_numpy()
+
+    table = bytearray()
+    interned = {}
+    for field, column in STRING_FIELDS:
+        offsets = np.empty(len(df), dtype=np.int64)
+        lengths = np.empty(len(df), dtype=np.int32)
+        for i, value in enumerate(df[column].to_numpy()):
+            if value not in interned:
+                encoded = value.encode("utf-8")
+                interned[value] = (len(table), len(encoded))
+                table += encoded
+            offsets[i], lengths[i] = interned[value]
+        records[f"{field}_off"] = offsets
+        records[f"{field}_len"] = lengths
+
+    parent = os.path.dirname(os.path.abspath(index_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".geo_index.", dir=parent)
+    np.save(os.path.join(tmp_dir, "records.npy"), records)
+    with open(os.path.join(tmp_dir, "strings.bin"), "wb") as f:
+        f.write(bytes(table) or b"\0")
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({**_source_signature(csv_path), "rows": len(records)}, f)
+
+    # Swap the new index in; if another worker beat us to it, keep theirs.
+    old_dir = None
+    if os.path.isdir(index_dir):
+        old_dir = tempfile.mkdtemp(prefix=".geo_index.old.", dir=parent)
+        os.rmdir(old_dir)
+        try:
+            os.rename(index_dir, old_dir)
+        except OSError:
+            old_dir = None
+    try:
+        os.rename(tmp_dir, index_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old_dir:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"✅ Geo index built: {len(records)} locations -> {index_dir}")
+    return index_dir
+
+
+def _is_current(csv_path, index_dir):
+    try:
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not os.path.exists(csv_path):
+        # No CSV to compare against (e.g. index shipped prebuilt): trust the index.
+        return True
+    signature = _source_signature(csv_path)
+    return all(meta.get(k) == v for k, v in signature.items())
+
+
+class GeoIndex:
+    """Read-only, memory-mapped view of a built geo index (pages are shared between workers)."""
+
+    def __init__(self, index_dir):
+        self.records = np.load(os.path.join(index_dir, "records.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "strings.bin"), "rb") as f:
+            self.strings = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.ids = self.records["criteria_id"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _strings(self, rows, field):
+        offsets = self.records[f"{field}_off"][rows]
+        lengths = self.records[f"{field}_len"][rows]
+        data = self.strings
+        return np.array(
+            [data[o:o + n].decode("utf-8") for o, n in zip(offsets.tolist(), lengths.tolist())],
+            dtype=object,
+        )
+
+    def positions(self, criteria_ids):
+        """(row positions, found mask) for an array of criteria IDs: one searchsorted."""
+        ids = np.asarray(criteria_ids, dtype=np.int64)
+        pos = np.searchsorted(self.ids, ids)
+        pos_clipped = np.minimum(pos, max(len(self.ids) - 1, 0))
+        found = (pos < len(self.ids)) & (self.ids[pos_clipped] == ids) if len(self.ids) else np.zeros(len(ids), bool)
+        return pos_clipped, found
+
+    def lookup(self, criteria_ids):
+        """
+        Batch lookup. Returns a DataFrame aligned with criteria_ids with columns
+        criteria_id, found, name, canonical_name, target_type, country_code, parent_id.
+        Unknown IDs get found=False, empty strings and parent_id 0.
+        """
+        ids = np.asarray(criteria_ids, dtype=np.int64)
+        pos, found = self.positions(ids)
+        out = {"criteria_id": ids, "found": found}
+        hit_rows = pos[found]
+        for field, _ in STRING_FIELDS:
+            values = np.full(len(ids), "", dtype=object)
+            values[found] = self._strings(hit_rows, field)
+            out[field] = values
+        parents = np.zeros(len(ids), dtype=np.int64)
+        parents[found] = self.records["parent_id"][hit_rows]
+        out["parent_id"] = parents
+        return pd.DataFrame(out)
+
+
+def get_geo_index():
+    """Open (building or rebuilding from the CSV if needed) the process-wide geo index."""
+    global _index
+    with _lock:
+        if _index is None:
+            if not _is_current(GEO_CSV_PATH, GEO_INDEX_DIR):
+                build_geo_index(GEO_CSV_PATH, GEO_INDEX_DIR)
+            _index = GeoIndex(GEO_INDEX_DIR)
+        return _index
+
+
+if __name__ == "__main__":
+    # python -m audit.geo_index [csv_path] [index_dir]
+    build_geo_index(*(sys.argv[1:3] or [GEO_CSV_PATH, GEO_INDEX_DIR]))
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from .ingest import micros_to_currency, safe_ratio
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+HOURS = list(range(24))
+# Summed per (day, hour) cell, in cube order
+SUM_METRICS = ["Clicks", "Conversions", "Cost ($)"]
+# Ratios are recomputed from the cell sums, never summed themselves
+RATIO_METRICS = {"CVR": ("Conversions", "Clicks"), "CPA ($)": ("Cost ($)", "Conversions")}
+PIVOT_METRICS = ["Clicks", "Conversions", "Cost ($)", "CVR"]
+
+
+class HourlyCube:
+    """
+    Day-of-week x hour sums (7 x 24 x SUM_METRICS, Monday first) for one account.
+    The pivot table, heatmaps, report tables and Gemini prompt are all read from it.
+    """
+
+    def __init__(self, sums):
+        self.sums = np.asarray(sums, dtype=np.float64).reshape(len(DAYS), len(HOURS), len(SUM_METRICS))
+        self.attrs = {}  # fetch_stats, like the fetchers' DataFrames
+
+    @classmethod
+    def from_accumulator(cls, cube):
+        """From an aggregate.HourlyAccumulator cube of (clicks, conversions, cost_micros)."""
+        sums = np.array(cube, dtype=np.float64, copy=True)
+        sums[:, :, 2] = micros_to_currency(sums[:, :, 2])
+        return cls(sums)
+
+    @classmethod
+    def empty_cube(cls):
+        return cls(np.zeros((len(DAYS), len(HOURS), len(SUM_METRICS))))
+
+    @property
+    def empty(self):
+        return not (self.sums[:, :, 0] > 0).any()
+
+    def metric(self, name):
+        """7 x 24 array of one metric."""
+        if name in RATIO_METRICS:
+            numerator, denominator = RATIO_METRICS[name]
+            return safe_ratio(self.metric(numerator), self.metric(denominator))
+        return self.sums[:, :, SUM_METRICS.index(name)]
+
+    def _active(self):
+        clicked = self.sums[:, :, 0] > 0
+        return clicked.any(axis=1), clicked.any(axis=0)
+
+    def grid(self, name):
+        """Day x Hour DataFrame of one metric over the days and hours that had clicks."""
+        days, hours = self._active()
+        return pd.DataFrame(
+            self.metric(name)[np.ix_(days, hours)],
+            index=pd.Index(np.array(DAYS, dtype=object)[days], name="Day"),
+            columns=pd.Index(np.array(HOURS)[hours], name="Hour"),
+        )
+
+    def pivot(self, metrics=PIVOT_METRICS):
+        """Multi-metric pivot (columns: metric, hour), as pivot_table would lay it out."""
+        return pd.concat({name: self.grid(name) for name in metrics}, axis=1)
+
+    def cells(self):
+        """One row per (day, hour) cell with clicks: Day, Hour, sums and ratios."""
+        day_idx, hours = np.nonzero(self.sums[:, :, 0] > 0)
+        data = {"Day": np.array(DAYS, dtype=object)[day_idx], "Hour": hours}
+        for name in SUM_METRICS + list(RATIO_METRICS):
+            data[name] = self.metric(name)[day_idx, hours]
+        df = pd.DataFrame(data)
+        df["Clicks"] = df["Clicks"].astype("int64")
+        return df
+
+    def prompt_table(self):
+        """
+        Compact CSV of the cube for an LLM prompt: the active cells (at most 168) plus
+        day and hour totals with their recomputed ratios.
+        """
+        cells = self.cells().round({"Conversions": 2, "Cost ($)": 2, "CVR": 4, "CPA ($)": 2})
+        clicks, conversions, cost = (self.sums[:, :, i] for i in range(len(SUM_METRICS)))
+        day_totals = pd.DataFrame({
+            "Day": DAYS,
+            "Clicks": clicks.sum(axis=1).astype("int64"),
+            "Conversions": conversions.sum(axis=1).round(2),
+            "Cost ($)": cost.sum(axis=1).round(2),
+            "CVR": safe_ratio(conversions.sum(axis=1), clicks.sum(axis=1)).round(4),
+        })
+        hour_totals = pd.DataFrame({
+            "Hour": HOURS,
+            "Clicks": clicks.sum(axis=0).astype("int64"),
+            "Conversions": conversions.sum(axis=0).round(2),
+            "Cost ($)": cost.sum(axis=0).round(2),
+            "CVR": safe_ratio(conversions.sum(axis=0), clicks.sum(axis=0)).round(4),
+        })
+        return (
+            "Day x hour cells:\n" + cells.to_csv(index=False)
+            + "\nDay totals:\n" + day_totals.to_csv(index=False)
+            + "\nHour totals:\n" + hour_totals.to_csv(index=False)
+        )
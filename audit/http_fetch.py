@@ -0,0 +1,228 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+import msgspec
+from . import services
+from .cache_store import DiskCache, CACHE_DIR
+
+# === HTTP Fetch Config ===
+HTTP_USER_AGENT = os.getenv("HTTP_USER_AGENT", "Mozilla/5.0")
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "20"))     # whole request incl. body
+HTTP_MAX_BYTES = int(os.getenv("HTTP_MAX_BYTES", str(2 * 1024 * 1024)))  # larger bodies are truncated
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", "4"))          # concurrent requests per host
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))               # kept-alive connections per host
+HTTP_BATCH_WORKERS = int(os.getenv("HTTP_BATCH_WORKERS", "16"))
+
+# === HTTP Cache Config ===
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+HTTP_CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(CACHE_DIR, "http.sqlite"))
+HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", str(7 * 24 * 3600)))  # how long validators are kept
+HTTP_CACHE_MAX_MB = int(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
+
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=2, connect=2, read=1, backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=64, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers.update({"User-Agent": HTTP_USER_AGENT, "Accept-Encoding": "gzip, deflate"})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HostSlots:
+    """One semaphore per host, bounding concurrent requests to it at HTTP_MAX_PER_HOST."""
+
+    def __init__(self, limit=HTTP_MAX_PER_HOST):
+        self.limit = limit
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.limit)
+            return slot
+
+
+# Pooled sockets, held host slots and worker threads are never shared with a forked child (see services)
+services.register("http_session", _build_session)
+services.register("http_host_slots", HostSlots)
+services.register(
+    "http_batch_pool",
+    lambda: ThreadPoolExecutor(max_workers=HTTP_BATCH_WORKERS, thread_name_prefix="http-fetch"),
+)
+
+
+def get_session():
+    """Process-wide requests session with keep-alive pools and retries on 429/5xx."""
+    return services.get("http_session")
+
+
+services.register("http_cache", lambda: DiskCache(HTTP_CACHE_PATH, HTTP_CACHE_TTL, HTTP_CACHE_MAX_MB * 1024 * 1024))
+
+
+def _get_cache():
+    return services.get("http_cache") if HTTP_CACHE_ENABLED else None
+
+
+def cache_key(url):
+    return "http:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _max_age(cache_control):
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else 0
+
+
+def _result(url, **fields):
+    result = {
+        "url": url, "final_url": url, "status": None, "body": b"", "encoding": None,
+        "content_type": "", "from_cache": False, "changed": True, "truncated": False,
+        "elapsed": 0.0, "error": None,
+    }
+    result.update(fields)
+    return result
+
+
+def _read_body(response, deadline):
+    """Read at most HTTP_MAX_BYTES of the (decompressed) body before the deadline."""
+    chunks = []
+    size = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= HTTP_MAX_BYTES:
+            truncated = True
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"body not received within {HTTP_TOTAL_TIMEOUT:.0f}s")
+    return b"".join(chunks)[:HTTP_MAX_BYTES], truncated
+
+
+def fetch(url):
+    """
+    GET url through the shared session and return a result dict:
+    url, final_url, status, body (bytes), encoding, content_type, from_cache,
+    changed (False if the server confirmed the cached copy with a 304), truncated,
+    elapsed and error (None on success).
+
+    Responses with an ETag / Last-Modified are kept on disk; later fetches send
+    If-None-Match / If-Modified-Since and reuse the stored body on a 304, and a
+    response still inside its Cache-Control max-age is served without a request.
+    """
+    start = time.monotonic()
+    cache = _get_cache()
+    key = cache_key(url)
+    cached = None
+    if cache is not None:
+        blob = cache.get(key)
+        if blob is not None:
+            try:
+                cached = msgspec.msgpack.decode(blob)
+            except msgspec.DecodeError:
+                cached = None
+    if cached and cached.get("fresh_until", 0) > time.time():
+        return _result(url, **_from_cached(cached), changed=False, elapsed=time.monotonic() - start)
+
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        with services.get("http_host_slots").get(url):
+            response = get_session().get(
+                url, headers=headers, stream=True,
+                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            )
+            try:
+                if response.status_code == 304 and cached:
+                    _store(cache, key, cached, response)
+                    return _result(url, **_from_cached(cached), changed=False, elapsed=time.monotonic() - start)
+                body, truncated = _read_body(response, start + HTTP_TOTAL_TIMEOUT)
+            finally:
+                response.close()
+    except Exception as e:
+        return _result(url, error=str(e), elapsed=time.monotonic() - start)
+
+    result = _result(
+        url,
+        final_url=response.url,
+        status=response.status_code,
+        body=body,
+        encoding=response.encoding if "charset" in response.headers.get("Content-Type", "").lower() else None,
+        content_type=response.headers.get("Content-Type", ""),
+        truncated=truncated,
+        elapsed=time.monotonic() - start,
+        error=None if response.ok else f"HTTP {response.status_code}",
+    )
+    if response.status_code == 200:
+        entry = {k: result[k] for k in ("final_url", "status", "body", "encoding", "content_type", "truncated")}
+        if cached and cached.get("body") == body:
+            result["changed"] = False
+        _store(cache, key, entry, response)
+    return result
+
+
+def _from_cached(entry):
+    return {
+        "final_url": entry.get("final_url"), "status": entry.get("status"), "body": entry.get("body", b""),
+        "encoding": entry.get("encoding"), "content_type": entry.get("content_type", ""),
+        "truncated": entry.get("truncated", False), "from_cache": True,
+    }
+
+
+def _store(cache, key, entry, response):
+    """Save (or refresh) a cache entry with the validators of response, if it has any."""
+    if cache is None:
+        return
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control:
+        return
+    entry = dict(entry)
+    entry["etag"] = response.headers.get("ETag") or entry.get("etag")
+    entry["last_modified"] = response.headers.get("Last-Modified") or entry.get("last_modified")
+    max_age = 0 if "no-cache" in cache_control else _max_age(cache_control)
+    entry["fresh_until"] = time.time() + max_age
+    if entry["etag"] or entry["last_modified"] or max_age:
+        cache.set(key, msgspec.msgpack.encode(entry))
+
+
+def fetch_many(urls):
+    """
+    Fetch several URLs concurrently (bounded by HTTP_BATCH_WORKERS overall and
+    HTTP_MAX_PER_HOST per host). Returns {url: result} for the distinct URLs given.
+    """
+    unique = list(dict.fromkeys(u for u in urls if u))
+    if not unique:
+        return {}
+    pool = services.get("http_batch_pool")
+    futures = {url: pool.submit(fetch, url) for url in unique}
+    return {url: future.result() for url, future in futures.items()}
+
+
+def cache_stats():
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {}
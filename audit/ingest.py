@@ -0,0 +1,192 @@
+import os
+import enum
+import numpy as np
+from operator import attrgetter
+
+# Rows are decoded straight into typed NumPy buffers that grow CHUNK_SIZE rows at a time,
+# so large accounts never materialize one Python dict per row.
+CHUNK_SIZE = 4096
+
+# Decode from the raw protobuf messages underneath proto-plus wrappers. Attribute access
+# on raw messages is several times faster and yields plain ints for enums.
+RAW_DECODE = os.getenv("GOOGLE_ADS_RAW_DECODE", "1") == "1"
+
+
+class ColumnBuffer:
+    """
+    Append-only typed column backed by a preallocated NumPy array.
+    Values are staged in a small Python list and copied into the array one chunk at
+    a time, which is much cheaper than a NumPy __setitem__ per value.
+    """
+
+    def __init__(self, dtype, chunk_size=CHUNK_SIZE):
+        self.dtype = np.dtype(dtype)
+        self._chunk_size = chunk_size
+        self._data = np.empty(chunk_size, dtype=self.dtype)
+        self._size = 0
+        self._pending = []
+        self.append = self._pending.append
+
+    def __len__(self):
+        return self._size + len(self._pending)
+
+    def _reserve(self, needed):
+        if needed <= len(self._data):
+            return
+        # Grow geometrically past the first chunks to keep appends amortized O(1).
+        capacity = max(needed, len(self._data) + max(self._chunk_size, len(self._data) // 2))
+        grown = np.empty(capacity, dtype=self.dtype)
+        grown[:self._size] = self._data[:self._size]
+        self._data = grown
+
+    def flush(self):
+        if not self._pending:
+            return
+        end = self._size + len(self._pending)
+        self._reserve(end)
+        self._data[self._size:end] = self._pending
+        self._size = end
+        self._pending.clear()
+
+    def values(self):
+        """The filled part of the buffer (a view, no copy)."""
+        self.flush()
+        return self._data[:self._size]
+
+    def drain(self):
+        """Copy out the buffered values and reset the buffer for reuse."""
+        values = self.values().copy()
+        self._size = 0
+        return values
+
+
+def raw_message(message):
+    """The protobuf message under a proto-plus wrapper (raw messages are returned as-is)."""
+    pb = getattr(type(message), "pb", None)
+    return pb(message) if callable(pb) else message
+
+
+def iter_stream_rows(response, raw=None):
+    """
+    Flatten a search_stream response (batches of results) into rows.
+    With raw=True (default: RAW_DECODE) each batch is unwrapped once, so rows are raw
+    protobuf messages whether or not the client was built with use_proto_plus.
+    """
+    raw = RAW_DECODE if raw is None else raw
+    for batch in response:
+        yield from (raw_message(batch).results if raw else batch.results)
+
+
+def _group_by_message(fields):
+    """
+    Group field paths by their parent message so each nested message is resolved once
+    per row: ['metrics.clicks', 'metrics.ctr'] -> [('metrics', [(0, 'clicks'), (1, 'ctr')])].
+    """
+    groups = {}
+    for i, field in enumerate(fields):
+        parent, _, leaf = field.rpartition(".")
+        groups.setdefault(parent, []).append((i, leaf))
+    return list(groups.items())
+
+
+def _decode_plan(fields, buffers):
+    return [
+        (attrgetter(parent) if parent else None, [(leaf, buffers[i].append) for i, leaf in leaves])
+        for parent, leaves in _group_by_message(fields)
+    ]
+
+
+def iter_column_chunks(rows, schema, chunk_size=CHUNK_SIZE):
+    """
+    Decode rows into columns, yielded every chunk_size rows so callers can aggregate a
+    stream of any length in bounded memory. The buffers are reused between chunks.
+    schema: dict of GAQL field path -> NumPy dtype (use object for strings); each chunk
+    is a dict of field path -> 1-D array, in schema order.
+    """
+    fields = list(schema)
+    buffers = [ColumnBuffer(schema[f], chunk_size) for f in fields]
+    plan = _decode_plan(fields, buffers)
+    pending = 0
+    for row in rows:
+        for get_parent, leaves in plan:
+            message = get_parent(row) if get_parent else row
+            for leaf, append in leaves:
+                append(getattr(message, leaf))
+        pending += 1
+        if pending == chunk_size:
+            yield {f: buf.drain() for f, buf in zip(fields, buffers)}
+            pending = 0
+    if pending:
+        yield {f: buf.drain() for f, buf in zip(fields, buffers)}
+
+
+def empty_columns(schema):
+    return {f: np.empty(0, dtype=dtype) for f, dtype in schema.items()}
+
+
+def concat_columns(chunks, schema):
+    if not chunks:
+        return empty_columns(schema)
+    return {f: np.concatenate([chunk[f] for chunk in chunks]) for f in schema}
+
+
+def _plain(value):
+    # Proto-plus enums are IntEnums; store their numeric value like the raw API does.
+    if isinstance(value, enum.Enum):
+        return int(value)
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def encode_columns(columns):
+    """msgpack-ready form: numeric columns as raw buffers, string columns as lists."""
+    encoded = {}
+    for field, values in columns.items():
+        if values.dtype == object:
+            encoded[field] = {"dtype": "object", "data": [_plain(v) for v in values]}
+        else:
+            encoded[field] = {"dtype": values.dtype.str, "data": values.tobytes()}
+    return encoded
+
+
+def decode_columns(encoded, schema):
+    columns = {}
+    for field in schema:
+        item = encoded[field]
+        if item["dtype"] == "object":
+            columns[field] = np.array(item["data"], dtype=object)
+        else:
+            columns[field] = np.frombuffer(item["data"], dtype=np.dtype(item["dtype"])).copy()
+    return columns
+
+
+# --------------------------
+# Vectorized derived metrics
+# --------------------------
+
+def micros_to_currency(micros):
+    return np.asarray(micros, dtype=np.float64) / 1e6
+
+
+def safe_ratio(numerator, denominator):
+    """numerator / denominator element-wise, 0 where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=np.float64)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def map_codes(codes, mapping, default="UNKNOWN"):
+    """Map integer enum codes to labels in one take() over a lookup table."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if codes.size == 0:
+        return np.empty(0, dtype=object)
+    size = max(max(mapping, default=0), int(codes.max(initial=0))) + 1
+    table = np.full(size, default, dtype=object)
+    for code, label in mapping.items():
+        table[code] = label
+    labels = table[np.clip(codes, 0, size - 1)]
+    labels[codes < 0] = default
+    return labels
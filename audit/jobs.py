@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing still works within one process
+    fcntl = None
+
+# === Job Queue Config ===
+JOBS_DIR = os.path.join("generated_reports", "jobs")
+MAX_WORKERS = int(os.getenv("AUDIT_WORKERS", "2"))
+MAX_PENDING = int(os.getenv("AUDIT_MAX_PENDING", "20"))
+JOB_MEMORY_TTL = int(os.getenv("AUDIT_JOB_MEMORY_TTL", "3600"))  # finished jobs are then read from disk only
+
+# === Job Coalescing Config ===
+# Identical audits (same account, login customer, date window and options) share one job:
+# across requests and gunicorn workers while it runs, and for a while after it is done.
+KEYS_DIR = os.path.join(JOBS_DIR, "keys")
+AUDIT_FRESHNESS = int(os.getenv("AUDIT_FRESHNESS_SECONDS", "900"))
+REPORT_DATE_WINDOW = "LAST_30_DAYS"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_lock = threading.Lock()
+_jobs = {}
+_executor = None
+_key_locks = {}  # audit key -> [lock, number of submissions using it]
+_leases = {}  # job_id -> lease file held by this process while the job is queued or running
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+def _get_executor():
+    """Create the worker pool on first use so nothing is started before gunicorn forks."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="audit-job")
+        return _executor
+
+
+def _after_fork_in_child():
+    # Worker threads do not survive fork: a child starts with its own (lazy) pool.
+    # Lease files are closed too, so a child never keeps a parent's job looking alive.
+    global _lock, _executor
+    _lock = threading.Lock()
+    _key_locks.clear()
+    _executor = None
+    _jobs.clear()
+    for lease in _leases.values():
+        lease.close()
+    _leases.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _job_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def _persist(job):
+    """Write the job status atomically so every gunicorn worker can read it."""
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    tmp_path = _job_path(job["id"]) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp_path, _job_path(job["id"]))
+
+
+def _update(job_id, **fields):
+    with _lock:
+        job = _jobs[job_id]
+        job.update(fields)
+        snapshot = dict(job)
+    _persist(snapshot)
+    return snapshot
+
+
+def _pending_count():
+    return sum(1 for job in _jobs.values() if job["status"] in (QUEUED, RUNNING))
+
+
+def _evict_finished(now):
+    """Forget finished jobs older than JOB_MEMORY_TTL (their JSON stays on disk). Call under _lock."""
+    for job_id in [
+        job_id for job_id, job in _jobs.items()
+        if job["status"] in (DONE, FAILED) and now - (job.get("finished_at") or now) > JOB_MEMORY_TTL
+    ]:
+        del _jobs[job_id]
+
+
+def _run(job_id, fn, args):
+    _update(job_id, status=RUNNING, started_at=time.time())
+    try:
+        result = fn(*args)
+        _update(job_id, status=DONE, finished_at=time.time(), result=result)
+        print(f"✅ Job {job_id} finished")
+    except Exception as e:
+        traceback.print_exc()
+        _update(job_id, status=FAILED, finished_at=time.time(), error=str(e))
+        print(f"❌ Job {job_id} failed: {e}")
+    finally:
+        _release_lease(job_id)
+
+
+def audit_key(customer_id, login_customer_id, date_window, options=None):
+    """Identity of an audit request: equal keys produce the same report."""
+    raw = json.dumps(
+        [str(customer_id), str(login_customer_id or ""), list(date_window), options or {}],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _key_path(key, suffix):
+    return os.path.join(KEYS_DIR, f"{key}{suffix}")
+
+
+@contextmanager
+def _key_lock(key):
+    """
+    Serialize submissions for one key across threads and worker processes. Other keys
+    are never blocked (the access check made under this lock is a network call).
+    """
+    with _lock:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        os.makedirs(KEYS_DIR, exist_ok=True)
+        with entry[0], open(_key_path(key, ".lock"), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+    finally:
+        with _lock:
+            entry[1] -= 1
+            if not entry[1]:
+                _key_locks.pop(key, None)
+
+
+def _lease_path(job_id):
+    return os.path.join(JOBS_DIR, f"{job_id}.lease")
+
+
+def _take_lease(job_id):
+    """
+    Hold an exclusive flock on the job's lease file until the job ends. The OS drops it
+    if this worker dies, so a crashed job never keeps new requests attached to it.
+    """
+    if fcntl is None:
+        return
+    lease = open(_lease_path(job_id), "a")
+    fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    with _lock:
+        _leases[job_id] = lease
+
+
+def _release_lease(job_id):
+    with _lock:
+        lease = _leases.pop(job_id, None)
+    if lease is not None:
+        try:
+            os.remove(_lease_path(job_id))
+        except OSError:
+            pass
+        lease.close()
+
+
+def _lease_alive(job_id):
+    if fcntl is None:
+        return True
+    try:
+        probe = open(_lease_path(job_id), "rb")
+    except OSError:
+        return False
+    with probe:
+        try:
+            fcntl.flock(probe, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        return False
+
+
+def _job_for_key(key):
+    try:
+        with open(_key_path(key, ".json"), "r", encoding="utf-8") as f:
+            return get_job(json.load(f).get("job_id"))
+    except (OSError, ValueError):
+        return None
+
+
+def _reusable(job):
+    if job["status"] in (QUEUED, RUNNING):
+        return _lease_alive(job["id"])
+    if job["status"] == DONE:
+        result = job.get("result")
+        return bool(result) and os.path.exists(result) \
+            and time.time() - (job.get("finished_at") or 0) <= AUDIT_FRESHNESS
+    return False
+
+
+def _enqueue(fn, args, meta, key=None):
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "status": QUEUED,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+        "key": key,
+        **meta,
+    }
+    with _lock:
+        _evict_finished(job["created_at"])
+        if _pending_count() >= MAX_PENDING:
+            raise JobQueueFull(f"{MAX_PENDING} audits already queued or running")
+        _jobs[job_id] = job
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _take_lease(job_id)
+    _persist(job)
+    _get_executor().submit(_run, job_id, fn, args)
+    return dict(job)
+
+
+def submit_job(fn, *args, key=None, can_share=None, **meta):
+    """
+    Queue fn(*args) on the bounded worker pool and return the job dict immediately.
+    Extra keyword arguments are stored on the job as metadata (e.g. owner, customer_id).
+    With a key, a queued / running job for the same key (in any worker), or one that
+    finished within AUDIT_FRESHNESS seconds, is returned instead of starting another.
+    can_share() is asked before handing another owner's job to this caller.
+    """
+    if key is None:
+        return _enqueue(fn, args, meta)
+    with _key_lock(key):
+        existing = _job_for_key(key)
+        if existing is not None and _reusable(existing) and (
+            can_share is None or existing.get("owner") == meta.get("owner") or can_share()
+        ):
+            print(f"ℹ️ Reusing {existing['status']} job {existing['id']} for an identical audit request")
+            return existing
+        job = _enqueue(fn, args, meta, key=key)
+        tmp_path = _key_path(key, ".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job["id"]}, f)
+        os.replace(tmp_path, _key_path(key, ".json"))
+        return job
+
+
+def submit_report_job(customer_id, google_ads_client, owner=None, options=None):
+    """
+    Queue a full Google Ads audit for customer_id and return its job dict (possibly an
+    identical audit already running or just finished; see submit_job).
+    """
+    from .main_runner import generate_google_ads_report
+    from .gaql_cache import resolve_date_window
+    from .ads_api import has_account_access
+
+    key = audit_key(
+        customer_id, getattr(google_ads_client, "login_customer_id", None),
+        resolve_date_window(f"DURING {REPORT_DATE_WINDOW}"), options,
+    )
+    return submit_job(
+        generate_google_ads_report, customer_id, google_ads_client,
+        key=key,
+        # Another user's report is only shared if this user's credentials can read the account
+        can_share=lambda: has_account_access(google_ads_client, customer_id),
+        customer_id=customer_id, owner=owner
+    )
+
+
+def _read_job(job_id):
+    try:
+        with open(_job_path(job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_job(job_id):
+    """
+    Return the job dict for job_id (from this worker or from disk), or None. A queued /
+    running job whose worker died (its lease is gone) is marked failed.
+    """
+    if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+        return None
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+    job = _read_job(job_id)
+    if job is not None and job["status"] in (QUEUED, RUNNING) and not _lease_alive(job_id):
+        # Re-read: the job may have finished (and released its lease) since the first read
+        job = _read_job(job_id)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return job
+        job.update(status=FAILED, finished_at=time.time(), error="The worker running this audit stopped")
+        _persist(job)
+        print(f"❌ Job {job_id} lost its worker; marked failed")
+    return job
+
+
+def public_view(job):
+    """Status payload that is safe to return to the browser (no server paths)."""
+    result = job.get("result")
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "customer_id": job.get("customer_id"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+        "report": os.path.basename(result) if result else None,
+        "error": job.get("error"),
+    }
@@ -0,0 +1,72 @@
+import os
+import pandas as pd
+
+# === LP Audit Budget ===
+# Only the highest-value landing pages get a Gemini audit; the rest are summarized
+# from their metrics so the stage has a predictable upper bound on time and spend.
+LP_AUDIT_MAX_PAGES = int(os.getenv("LP_AUDIT_MAX_PAGES", "25"))              # distinct pages sent to Gemini
+# Pages fetched and fingerprinted; near-duplicates of an audited page share its findings
+LP_AUDIT_FETCH_PAGES = int(os.getenv("LP_AUDIT_FETCH_PAGES", str(4 * LP_AUDIT_MAX_PAGES)))
+LP_AUDIT_TIME_BUDGET = float(os.getenv("LP_AUDIT_TIME_BUDGET", "240"))       # seconds, fetch + audits
+LP_AUDIT_TOKEN_BUDGET = int(os.getenv("LP_AUDIT_TOKEN_BUDGET", "150000"))    # estimated prompt tokens
+LP_RANK_COST_WEIGHT = float(os.getenv("LP_RANK_COST_WEIGHT", "0.7"))        # the rest is click share
+
+SKIP_NOT_RANKED = f"Outside the top {LP_AUDIT_FETCH_PAGES} pages by spend/click share"
+SKIP_PAGE_LIMIT = f"Limit of {LP_AUDIT_MAX_PAGES} audited pages reached"
+SKIP_TOKEN_BUDGET = "Token budget reached"
+SKIP_TIME_BUDGET = "Time budget reached"
+SKIP_FETCH_FAILED = "Page could not be fetched"
+SKIP_AUDIT_FAILED = "Audit failed (Gemini error)"
+SKIP_NO_FINDINGS = "Audited: no findings"
+
+SKIPPED_COLUMNS = ["Priority", "URL", "Clicks", "Conversions", "Cost ($)", "CPA ($)", "Reason", "Summary"]
+
+
+def rank_landing_pages(df_lp):
+    """
+    Landing pages ordered by audit priority: a weighted sum of each page's share of
+    spend and share of clicks. Adds "Spend Share", "Click Share", "Priority Score"
+    and "Priority" (1 = audit first) columns to a copy of df_lp.
+    """
+    df = df_lp.copy()
+    cost = df.get("Cost ($)", pd.Series(0.0, index=df.index)).fillna(0).astype(float)
+    clicks = df.get("Clicks", pd.Series(0, index=df.index)).fillna(0).astype(float)
+    df["Spend Share"] = cost / cost.sum() if cost.sum() > 0 else 0.0
+    df["Click Share"] = clicks / clicks.sum() if clicks.sum() > 0 else 0.0
+    df["Priority Score"] = LP_RANK_COST_WEIGHT * df["Spend Share"] + (1 - LP_RANK_COST_WEIGHT) * df["Click Share"]
+    # Ties (e.g. no spend at all) keep a stable, URL-based order
+    df = df.sort_values(["Priority Score", "Final URL"], ascending=[False, True], kind="mergesort", ignore_index=True)
+    df["Priority"] = range(1, len(df) + 1)
+    return df
+
+
+def summarize_page(row, account_cpa):
+    """Deterministic one-line read of a page's metrics, for pages that are not audited."""
+    clicks = int(row.get("Clicks", 0) or 0)
+    conversions = float(row.get("Conversions", 0) or 0)
+    cost = float(row.get("Cost ($)", 0) or 0)
+    text = f"{row.get('Spend Share', 0):.1%} of landing page spend, {clicks} clicks, {conversions:.1f} conversions."
+    if cost > 0 and conversions == 0:
+        return text + f" ${cost:.2f} spent with no conversions: check the page and conversion tracking."
+    if conversions > 0 and account_cpa > 0:
+        cpa = cost / conversions
+        if cpa > 1.5 * account_cpa:
+            return text + f" CPA ${cpa:.2f} is {cpa / account_cpa - 1:.0%} above the account average."
+        if cpa < 0.67 * account_cpa:
+            return text + f" CPA ${cpa:.2f} is {1 - cpa / account_cpa:.0%} below the account average."
+    if clicks == 0:
+        return text + " No traffic in the period."
+    return text + " In line with the account average."
+
+
+def skipped_pages_table(ranked, reasons):
+    """Rows of ranked that were not audited ({url: reason}), with their metric summaries."""
+    if not reasons:
+        return pd.DataFrame(columns=SKIPPED_COLUMNS)
+    total_conversions = ranked["Conversions"].sum() if "Conversions" in ranked else 0
+    account_cpa = ranked["Cost ($)"].sum() / total_conversions if total_conversions else 0.0
+    skipped = ranked[ranked["Final URL"].isin(reasons)].copy()
+    skipped["URL"] = skipped["Final URL"]
+    skipped["Reason"] = skipped["Final URL"].map(reasons)
+    skipped["Summary"] = [summarize_page(row, account_cpa) for _, row in skipped.iterrows()]
+    return skipped.reindex(columns=SKIPPED_COLUMNS).reset_index(drop=True)
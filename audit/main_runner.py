@@ -1,4 +1,3 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from .fetch_campaigns import fetch_campaign_data
 from .fetch_keywords import fetch_keyword_data
 from .fetch_landing_pages import fetch_landing_page_data
@@ -12,110 +11,141 @@ from .gemini_wasted import gemini_wasted_spend_summary
 from .gemini_lp_audit import run_landing_page_audits
 from .gemini_competitor import generate_competitor_insights
 from .utils_analysis import wasted_spend_analyzer, gemini_summary_risks_opps
-from .report_generator import generate_report
-from .config import model
+from .report_generator import generate_report, new_report_path
+from .charts import render_heatmaps, save_heatmaps
+from .hourly_cube import HourlyCube
+from .config import model, LAUNCH_CHROME_FROM_PYTHON
+from . import services
+from .pipeline import Pipeline
+from .ads_api import quota_stats
 import pandas as pd
 
 
-def generate_google_ads_report(customer_id, google_ads_client):
+def _top_by_cost(df, n):
+    if df is None or df.empty or "Cost ($)" not in df.columns:
+        return pd.DataFrame() if df is None else df
+    return df.sort_values("Cost ($)", ascending=False).head(n)
+
+
+def _collect_fetch_stats(frames):
+    """Row counts / truncation reported by each fetcher (DataFrame.attrs)."""
+    fetch_stats = {}
+    for name, frame in frames.items():
+        stats = getattr(frame, "attrs", {}).get("fetch_stats")
+        if stats:
+            fetch_stats[name] = stats
+            print(f"ℹ️ {name}: {stats['rows_streamed']} rows streamed, {stats['rows_kept']} kept"
+                  f"{' (truncated)' if stats['truncated'] else ''}")
+    return fetch_stats
+
+
+def _fetched(name, fn, *args):
+    def stage():
+        result = fn(*args)
+        print(f"ℹ️ Fetched: {name}")
+        return result
+    return stage
+
+
+def generate_google_ads_report(customer_id, google_ads_client, output=None):
     """
-    Orchestrates fetching, Gemini summarization and report generation in parallel.
-    Signature matches how app.py calls it.
+    Orchestrates fetching, Gemini summarization and report generation as a DAG:
+    every stage starts as soon as the data it needs is ready (e.g. the geo summary
+    does not wait for the keyword fetch), so the run takes as long as its longest
+    dependency chain. The report is written to output (a unique path under
+    generated_reports by default) and its path is returned.
     """
+    output = output or new_report_path()
+    # One-time, per-process setup that used to run when audit.config was imported
+    services.get("output_dirs")
+    if LAUNCH_CHROME_FROM_PYTHON:
+        services.get("chrome_debugger")
 
-    # 1) Fetch data in parallel
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {
-            executor.submit(fetch_campaign_data, google_ads_client, customer_id, "LAST_30_DAYS"): "campaigns",
-            executor.submit(fetch_keyword_data, google_ads_client, customer_id): "keywords",
-            executor.submit(fetch_landing_page_data, google_ads_client, customer_id): "landing_pages",
-            executor.submit(fetch_hourly_performance_data, google_ads_client, customer_id): "hourly",
-            executor.submit(fetch_geo_performance_data, google_ads_client, customer_id): "geo"
-        }
-
-        results = {}
-        for fut in as_completed(futures):
-            name = futures[fut]
-            try:
-                res = fut.result()
-                results[name] = res
-                print(f"ℹ️ Fetched: {name}")
-            except Exception as e:
-                print(f"❌ Error in fetch {name}: {e}")
-                results[name] = pd.DataFrame() if name != "hourly" else (pd.DataFrame(), pd.DataFrame())
-
-    df_campaign = (
-        results.get("campaigns", pd.DataFrame())
-        .sort_values("Cost ($)", ascending=False)
-        .head(30)
-                if results.get("campaigns") is not None
-        else pd.DataFrame()
-    )
-    kw_df = (
-        results.get("keywords", pd.DataFrame())
-        .sort_values("Cost ($)", ascending=False)
-        .head(50)
-        if results.get("keywords") is not None
-        else pd.DataFrame()
-    )
-    lp_df = results.get("landing_pages", pd.DataFrame())
-    hour_pivot, hour_raw_df = results.get("hourly", (pd.DataFrame(), pd.DataFrame()))
-    geo_df = (
-        results.get("geo", pd.DataFrame())
-        .sort_values("Cost ($)", ascending=False)
-        .head(50)
-        if results.get("geo") is not None
-        else pd.DataFrame()
+    empty = pd.DataFrame()
+    p = Pipeline(f"Report {customer_id}")
+
+    # 1) Fetch
+    p.add("campaigns_raw", _fetched("campaigns", fetch_campaign_data, google_ads_client, customer_id, "LAST_30_DAYS"), default=empty)
+    p.add("keywords_raw", _fetched("keywords", fetch_keyword_data, google_ads_client, customer_id), default=empty)
+    p.add("landing_pages", _fetched("landing_pages", fetch_landing_page_data, google_ads_client, customer_id), default=empty)
+    p.add("hourly", _fetched("hourly", fetch_hourly_performance_data, google_ads_client, customer_id),
+          default=HourlyCube.empty_cube())
+    p.add("geo_raw", _fetched("geo", fetch_geo_performance_data, google_ads_client, customer_id), default=empty)
+    p.add(
+        "fetch_stats",
+        lambda campaigns, keywords, landing_pages, hourly, geo: _collect_fetch_stats({
+            "campaigns": campaigns, "keywords": keywords, "landing_pages": landing_pages,
+            "hourly": hourly, "geo": geo,
+        }),
+        "campaigns_raw", "keywords_raw", "landing_pages", "hourly", "geo_raw", default={},
     )
 
-    # 2) Run Gemini / audits in parallel
-    with ThreadPoolExecutor(max_workers=7) as executor:
-        f_risk_opps = executor.submit(gemini_summary_risks_opps, df_campaign)  # ✅ New Risks/Opportunities
-        f_insight_30 = executor.submit(gemini_summary, df_campaign, "Campaigns")
-        f_insight_kw = executor.submit(gemini_keyword_summary, kw_df)
-        f_insight_hour = executor.submit(gemini_hourly_summary, hour_raw_df)
-        f_insight_geo = executor.submit(gemini_geo_summary, geo_df)
-        f_wasted = executor.submit(gemini_wasted_spend_summary, kw_df)
-        f_lp_audit = executor.submit(run_landing_page_audits, lp_df, 5)
-
-        # Competitor insights (safe execution)
-        try:
-            f_competitor = executor.submit(
-                generate_competitor_insights,
-                kw_df,
-                lp_df,
-                lp_df["Final URL"].iloc[0]
-                if (lp_df is not None and not lp_df.empty)
-                else "",
-                model,
-            )
-        except Exception:
-            f_competitor = None
-
-        # Collect results
-        risk_opp_data = f_risk_opps.result() if f_risk_opps else {"Risks": [], "Opportunities": []}
-        insight_30 = f_insight_30.result() if f_insight_30 else ""
-        insight_kw = f_insight_kw.result() if f_insight_kw else ""
-        insight_hour = f_insight_hour.result() if f_insight_hour else ""
-        insight_geo = f_insight_geo.result() if f_insight_geo else ""
-        wasted_insight = f_wasted.result() if f_wasted else ""
-        lp_audit_rows = f_lp_audit.result() if f_lp_audit else []
-        competitor_df = f_competitor.result() if (f_competitor is not None) else None
-
-    # 3) Additional lightweight analysis
-    wasted_flags = wasted_spend_analyzer(kw_df)
+    # 2) Shape
+    p.add("campaigns", lambda df: _top_by_cost(df, 30), "campaigns_raw", default=empty)
+    p.add("keywords", lambda df: _top_by_cost(df, 50), "keywords_raw", default=empty)
+    p.add("geo", lambda df: _top_by_cost(df, 50), "geo_raw", default=empty)
+
+    # 3) Analyze / summarize (heatmaps render in the chart process pool)
+    p.add("heatmaps", render_heatmaps, "hourly", default={})
+    p.add("risk_opps", gemini_summary_risks_opps, "campaigns", default={"Risks": [], "Opportunities": []})
+    p.add("insight_30", lambda df: gemini_summary(df, "Campaigns"), "campaigns", default="")
+    p.add("insight_kw", gemini_keyword_summary, "keywords", default="")
+    p.add("insight_hour", gemini_hourly_summary, "hourly", default="")
+    p.add("insight_geo", gemini_geo_summary, "geo", default="")
+    p.add("wasted_insight", gemini_wasted_spend_summary, "keywords", default="")
+    p.add("wasted_flags", wasted_spend_analyzer, "keywords", default=[])
+    p.add("lp_audit", lambda lp_df: run_landing_page_audits(lp_df, 5), "landing_pages", default=([], None))
+    p.add(
+        "competitor",
+        lambda kw_df, lp_df: generate_competitor_insights(
+            kw_df,
+            lp_df,
+            lp_df["Final URL"].iloc[0] if (lp_df is not None and not lp_df.empty) else "",
+            model,
+            google_ads_client,
+            customer_id,
+        ),
+        "keywords", "landing_pages", default=None,
+    )
 
     # 4) Generate report
-    filename = generate_report(
-        df_campaign, kw_df, hour_pivot, hour_raw_df,
-        insight_30, insight_kw, insight_hour,
-        geo_df, insight_geo,
-        wasted_flags=wasted_flags,
-        wasted_insight=wasted_insight,
-        lp_audit_rows=lp_audit_rows,
-        risk_opp_insights=risk_opp_data,  # ✅ Dict instead of raw text
-        lp_flags=None,
-        competitor_insights=competitor_df
+    def assemble(df_campaign, kw_df, hourly, geo_df, insight_30, insight_kw, insight_hour, insight_geo,
+                 wasted_flags, wasted_insight, lp_audit, risk_opp_data, competitor_df, fetch_stats, heatmaps):
+        lp_audit_rows, lp_skipped = lp_audit
+        filename = generate_report(
+            df_campaign, kw_df, hourly,
+            insight_30, insight_kw, insight_hour,
+            geo_df, insight_geo,
+            wasted_flags=wasted_flags,
+            wasted_insight=wasted_insight,
+            lp_audit_rows=lp_audit_rows,
+            lp_skipped=lp_skipped,
+            risk_opp_insights=risk_opp_data,  # ✅ Dict instead of raw text
+            lp_flags=None,
+            competitor_insights=competitor_df,
+            fetch_stats=fetch_stats,
+            heatmaps=heatmaps,
+            output=output
+        )
+        save_heatmaps(heatmaps, filename)
+        return filename
+
+    p.add(
+        "report", assemble,
+        "campaigns", "keywords", "hourly", "geo", "insight_30", "insight_kw", "insight_hour", "insight_geo",
+        "wasted_flags", "wasted_insight", "lp_audit", "risk_opps", "competitor", "fetch_stats", "heatmaps",
     )
 
-    return filename
+    results = p.run()
+    p.log_critical_path()
+
+    # Google Ads API usage of this process so far (shared quota across reports)
+    for key, stats in quota_stats().items():
+        if key == f"customer:{customer_id}" or key.startswith("token:"):
+            print(f"ℹ️ Google Ads API {key}: {stats['requests']} requests, {stats['rows']} rows, "
+                  f"{stats['retries']} retries ({stats['resumes']} resumed), {stats['quota_errors']} quota errors, "
+                  f"{stats['throttle_wait']:.1f}s throttled")
+
+    if "error" in p.timings.get("report", {}):
+        raise RuntimeError(f"Report generation failed: {p.timings['report']['error']}")
+    return results["report"]
@@ -0,0 +1,114 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from . import services
+
+# === Pipeline Config ===
+# Stages of every report running in this process share one bounded pool
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "12"))
+
+services.register(
+    "pipeline_pool",
+    lambda: ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline"),
+)
+
+
+class Stage:
+    def __init__(self, name, fn, deps, default):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+        self.default = default
+
+
+class Pipeline:
+    """
+    A DAG of named stages. Each stage is called with the results of the stages it
+    depends on (positionally, in the order given) and starts as soon as they are all
+    done. A stage that raises is logged and yields its default instead, so one failed
+    fetch or summary leaves an empty section rather than no report.
+    """
+
+    def __init__(self, name="pipeline"):
+        self.name = name
+        self._stages = {}
+        self.timings = {}
+
+    def add(self, name, fn, *deps, default=None):
+        """Add a stage; its dependencies must already be added (which keeps the graph acyclic)."""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        unknown = [d for d in deps if d not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {unknown}")
+        self._stages[name] = Stage(name, fn, deps, default)
+        return name
+
+    def _call(self, stage, args, timing):
+        timing["start"] = time.monotonic()
+        try:
+            return stage.fn(*args)
+        except Exception as e:
+            timing["error"] = str(e)
+            print(f"❌ Error in stage {stage.name}: {e}")
+            return stage.default
+        finally:
+            timing["end"] = time.monotonic()
+
+    def run(self):
+        """Run every stage on the shared pipeline pool; returns {stage name: result}."""
+        pool = services.get("pipeline_pool")
+        started = time.monotonic()
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        self.timings = {}
+
+        def submit_ready():
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.deps):
+                    del pending[name]
+                    timing = self.timings[name] = {
+                        "ready": max((self.timings[d]["end"] for d in stage.deps), default=started)
+                    }
+                    args = [results[dep] for dep in stage.deps]
+                    running[pool.submit(self._call, stage, args, timing)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+            submit_ready()
+
+        for timing in self.timings.values():
+            for key in ("ready", "start", "end"):
+                timing[key] -= started
+        return results
+
+    def critical_path(self):
+        """
+        The chain of stages that determined the total run time: from the stage that
+        finished last, back through the dependency that finished last at each step.
+        Returns [(name, timing)] in run order.
+        """
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n]["end"])
+        path = []
+        while name is not None:
+            path.append((name, self.timings[name]))
+            deps = self._stages[name].deps
+            name = max(deps, key=lambda d: self.timings[d]["end"]) if deps else None
+        return path[::-1]
+
+    def log_critical_path(self):
+        path = self.critical_path()
+        if not path:
+            return
+        steps = " -> ".join(
+            f"{name} {t['end'] - t['start']:.1f}s"
+            + (f" (+{t['start'] - t['ready']:.1f}s queued)" if t["start"] - t["ready"] >= 0.1 else "")
+            for name, t in path
+        )
+        print(f"ℹ️ {self.name} critical path ({path[-1][1]['end']:.1f}s): {steps}")
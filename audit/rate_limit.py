@@ -0,0 +1,34 @@
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """Requests per second with a burst allowance; acquire() blocks until a token is free."""
+
+    def __init__(self, rate, burst, name="rate limit"):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                raise TimeoutError(f"{self.name}: no request slot before the deadline")
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base, cap):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
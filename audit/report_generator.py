@@ -1,13 +1,17 @@
 import os
+import uuid
 import datetime
 import json
 import pandas as pd
 from docx import Document
-from docx.shared import Inches, Pt
 from docx.enum.table import WD_TABLE_ALIGNMENT
+from .report_model import ReportWriter, DocxReport, StructuredReport, save_structured_report
+from .docx_tables import format_table, format_numeric_grid, save_document
+from .hourly_cube import PIVOT_METRICS
 from .utils_text import parse_json_insight_to_table
 from .utils_analysis import wasted_spend_analyzer
 from .utils_text import clean, safe_parse_gemini_json
+from .config import REPORTS_DIR
 
 
 def add_industry_benchmark_overlay(df, benchmarks):
@@ -23,102 +27,74 @@ def add_industry_benchmark_overlay(df, benchmarks):
     return df
 
 
-def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
+def new_report_path():
+    """
+    Unique .docx path under REPORTS_DIR. The structured JSON and the heatmap folder are
+    named after it, so concurrent audits (threads or gunicorn workers) never share files.
+    """
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(REPORTS_DIR, f"google_ads_audit_{stamp}_{uuid.uuid4().hex[:12]}.docx")
+
+
+def generate_report(df_30, kw_df, hourly_cube,
                     insight_30, insight_kw, insight_hour,
                     geo_df, insight_geo,
                     wasted_flags, wasted_insight,
                     lp_audit_rows,
-                    risk_opp_insights, lp_flags=None, competitor_insights=None):
+                    risk_opp_insights, lp_flags=None, competitor_insights=None,
+                    fetch_stats=None, heatmaps=None, output=None, lp_skipped=None):
+    """
+    Build the audit .docx (and its structured model for the web views). By default it
+    is saved under new_report_path() and the path is returned; output can be another
+    path, or a writable stream (e.g. a response body) the .docx is written straight into.
+    """
 
     doc = Document()
-    doc.add_heading("Google Ads Audit Report", 0)
-
-    def autofit_table(table):
-        table.allow_autofit = True
-        table.autofit = True
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        run.font.size = Pt(8)
+    structured = StructuredReport()
+    # Everything below is written to the .docx and to the structured model the web views use
+    out = ReportWriter([DocxReport(doc), structured])
+    out.heading("Google Ads Audit Report", 0)
 
     def add_table(title, df, columns):
         if df is None or df.empty:
             return
-        doc.add_heading(title, level=1)
-        table = doc.add_table(rows=1, cols=len(columns))
-        table.style = 'Table Grid'
-        table.alignment = WD_TABLE_ALIGNMENT.LEFT
-        autofit_table(table)
-        hdr = table.rows[0].cells
-        for i, col in enumerate(columns):
-            hdr[i].text = col
-        for _, row in df.iterrows():
-            cells = table.add_row().cells
-            for i, col in enumerate(columns):
-                val = row.get(col, "")
-                if col in ["Avg CPC", "CPA ($)", "Cost ($)"]:
-                    try:
-                        val = f"${float(val):.2f}" if val else "$0.00"
-                    except Exception:
-                        val = str(val)
-                elif col == "CTR":
-                    try:
-                        val = f"{float(val) * 100:.2f}%" if val else "0.00%"
-                    except Exception:
-                        pass
-                cells[i].text = str(val)
+        out.heading(title, level=1)
+        out.table(columns, format_table(df, columns), align=WD_TABLE_ALIGNMENT.LEFT)
 
     def add_json_insight_section(title, json_text):
-        doc.add_heading(title, level=1)
+        out.heading(title, level=1)
         df = parse_json_insight_to_table(json_text)
         if df is not None and not df.empty:
             add_table(title, df, df.columns.tolist())
         else:
-            doc.add_paragraph("⚠️ Unable to parse structured insights — showing raw output below.")
+            out.paragraph("⚠️ Unable to parse structured insights — showing raw output below.")
             if isinstance(json_text, str):
-                doc.add_paragraph(json_text.strip())
+                out.paragraph(json_text.strip())
             else:
-                doc.add_paragraph(str(json_text))
+                out.paragraph(str(json_text))
 
-    def add_hourly_pivot(pivot):
-        doc.add_heading("Hourly Performance Pivot", level=1)
-        try:
-            day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            pivot = pivot.reindex(day_order)
-        except Exception:
-            pass
-        try:
-            for metric in pivot.columns.levels[0]:
-                sub_df = pivot[metric].replace("", 0)
-                sub_df = sub_df.loc[(sub_df != 0).any(axis=1), (sub_df != 0).any(axis=0)]
-                if sub_df.empty:
-                    continue
-                doc.add_paragraph(f"{metric}")
-                table = doc.add_table(rows=sub_df.shape[0] + 1, cols=sub_df.shape[1] + 1)
-                table.style = 'Table Grid'
-                autofit_table(table)
-                hdr_cells = table.rows[0].cells
-                hdr_cells[0].text = "Day/Hour"
-                for j, col in enumerate(sub_df.columns):
-                    hdr_cells[j + 1].text = str(col)
-                for i, idx in enumerate(sub_df.index):
-                    row_cells = table.rows[i + 1].cells
-                    row_cells[0].text = str(idx)
-                    for j, col in enumerate(sub_df.columns):
-                        val = sub_df.loc[idx, col]
-                        row_cells[j + 1].text = f"{val:.2f}" if isinstance(val, (int, float)) and val != 0 else ""
-        except Exception:
-            pass
+    def add_hourly_pivot(cube):
+        out.heading("Hourly Performance Pivot", level=1)
+        if cube is None or cube.empty:
+            return
+        for metric in PIVOT_METRICS:
+            sub_df = cube.grid(metric)
+            sub_df = sub_df.loc[(sub_df != 0).any(axis=1), (sub_df != 0).any(axis=0)]
+            if sub_df.empty:
+                continue
+            out.paragraph(f"{metric}")
+            out.table(
+                ["Day/Hour"] + [str(col) for col in sub_df.columns],
+                [sub_df.index.astype(str).to_numpy()] + format_numeric_grid(sub_df)
+            )
 
     def add_heatmaps():
-        for metric in ["Clicks", "Conversions", "CVR"]:
-            img_path = f"report_images/{metric}_heatmap.png"
-            if os.path.exists(img_path):
-                try:
-                    doc.add_picture(img_path, width=Inches(6))
-                except Exception:
-                    pass
+        # PNG buffers rendered for this report by audit.charts
+        for metric, png in (heatmaps or {}).items():
+            try:
+                out.picture(png, metric)
+            except Exception:
+                pass
 
     # --- NEW: Risks and Opportunities split ---
     def add_risks_opportunities():
@@ -133,26 +109,26 @@ def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
             opps = pd.DataFrame(data.get("Opportunities", []))
 
             # Risks section
-            doc.add_heading("⚠️ Risks", level=1)
+            out.heading("⚠️ Risks", level=1)
             if not risks.empty:
                 add_table("Risks", risks, risks.columns.tolist())
             else:
-                doc.add_paragraph("No Risk insights generated.")
+                out.paragraph("No Risk insights generated.")
 
             # Opportunities section
-            doc.add_heading("✅ Opportunities", level=1)
+            out.heading("✅ Opportunities", level=1)
             if not opps.empty:
                 add_table("Opportunities", opps, opps.columns.tolist())
             else:
-                doc.add_paragraph("No Opportunity insights generated.")
+                out.paragraph("No Opportunity insights generated.")
 
         except Exception as e:
-            doc.add_heading("⚠️ Risks", level=1)
-            doc.add_paragraph(f"Failed to parse Risks: {e}")
-            doc.add_paragraph(str(risk_opp_insights))
+            out.heading("⚠️ Risks", level=1)
+            out.paragraph(f"Failed to parse Risks: {e}")
+            out.paragraph(str(risk_opp_insights))
 
-            doc.add_heading("✅ Opportunities", level=1)
-            doc.add_paragraph("Parsing failed.")
+            out.heading("✅ Opportunities", level=1)
+            out.paragraph("Parsing failed.")
     # --- END NEW ---
 
     # Benchmarks
@@ -178,12 +154,13 @@ def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
         if wasted_insight and wasted_insight.strip():
             add_json_insight_section("Wasted Spend Insights", wasted_insight)
         else:
-            doc.add_heading("Wasted Spend Insights", level=1)
-            doc.add_paragraph("No insights generated by Gemini.")
+            out.heading("Wasted Spend Insights", level=1)
+            out.paragraph("No insights generated by Gemini.")
 
     # --- Landing Page Audit Section ---
-    if lp_audit_rows:
-        doc.add_heading("Landing Page Audit Insights", level=1)
+    has_skipped = lp_skipped is not None and not lp_skipped.empty
+    if lp_audit_rows or has_skipped:
+        out.heading("Landing Page Audit Insights", level=1)
         for raw_json in lp_audit_rows:
             try:
                 data = json.loads(raw_json)
@@ -191,14 +168,21 @@ def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
                     data = [data]
                 df = pd.DataFrame(data)
                 if df.empty:
-                    raise ValueError("Empty LP audit data")
+                    continue  # audited, nothing found (listed with the pages not audited)
                 cols = ["URL"] + [c for c in df.columns if c != "URL"]
                 url = df["URL"].iloc[0]
-                doc.add_heading(f"Landing Page: {url}", level=2)
+                out.heading(f"Landing Page: {url}", level=2)
                 add_table("Landing Page Insights", df, cols)
             except Exception:
-                doc.add_paragraph("⚠️ Failed to parse LP audit JSON — showing raw output.")
-                doc.add_paragraph(raw_json.strip() if raw_json else "")
+                out.paragraph("⚠️ Failed to parse LP audit JSON — showing raw output.")
+                out.paragraph(raw_json.strip() if raw_json else "")
+        if has_skipped:
+            out.paragraph(
+                f"{len(lp_audit_rows)} of {len(lp_audit_rows) + len(lp_skipped)} landing pages were audited, "
+                "highest share of spend and clicks first (near-identical pages share one audit); "
+                "the rest are summarized from their metrics."
+            )
+            add_table("Landing Pages Not Audited", lp_skipped, lp_skipped.columns.tolist())
 
     # --- Geo Section ---
     add_table("Geographical Performance", geo_df, [
@@ -208,7 +192,7 @@ def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
     add_json_insight_section("Geographical Insights", insight_geo)
 
     # --- Hourly Section ---
-    add_hourly_pivot(hour_pivot)
+    add_hourly_pivot(hourly_cube)
     add_json_insight_section("Hourly Patterns Insights", insight_hour)
     add_heatmaps()
 
@@ -224,20 +208,40 @@ def generate_report(df_30, kw_df, hour_pivot, hour_raw_df,
             print(f"⚠️ Competitor insights parse error: {e}")
             competitor_insights = pd.DataFrame()
         if isinstance(competitor_insights, pd.DataFrame) and not competitor_insights.empty:
-            doc.add_heading("Competitor Intelligence", level=1)
+            out.heading("Competitor Intelligence", level=1)
             add_table(
                 "Top Competitor Insights",
                 competitor_insights,
                 ["Competitor", "Strengths", "Recommendations"]
             )
         else:
-            doc.add_heading("Competitor Intelligence", level=1)
-            doc.add_paragraph("No competitor insights found or could be parsed.")
+            out.heading("Competitor Intelligence", level=1)
+            out.paragraph("No competitor insights found or could be parsed.")
 
     # --- Risks & Opportunities (separate tabs) ---
     add_risks_opportunities()
 
-    filename = f"google_ads_audit_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-    doc.save(filename)
+    # --- Data Coverage (row counts from the streaming fetchers) ---
+    if fetch_stats:
+        coverage = pd.DataFrame([
+            {
+                "Dataset": name.replace("_", " ").title(),
+                "Rows Streamed": stats.get("rows_streamed", ""),
+                "Rows Kept": stats.get("rows_kept", ""),
+                "Truncated": "Yes" if stats.get("truncated") else "No"
+            }
+            for name, stats in fetch_stats.items()
+        ])
+        add_table("Data Coverage", coverage, coverage.columns.tolist())
+
+    if output is not None and not isinstance(output, (str, os.PathLike)):
+        save_document(doc, output)
+        return output
+    filename = output or new_report_path()
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    save_document(doc, filename)
+    save_structured_report(structured.result(), filename)
     print(f"✅ Report saved as {filename}")
     return os.path.abspath(filename)
@@ -0,0 +1,212 @@
+import os
+import ast
+import json
+import threading
+from collections import OrderedDict
+
+# generate_report writes each report through one or more backends: the .docx users
+# download and a structured model (list of sections) saved as JSON next to it, which
+# the web views load instead of re-parsing the .docx.
+
+INTRO_SECTION = {
+    "title": "⭐ Introduction",
+    "content": [{
+        "type": "paragraph",
+        "content": (
+            "Hello, this is a structured report generated from a Google Ads audit document. "
+            "It contains insights, visualizations, and optimization suggestions."
+        )
+    }]
+}
+MAX_CACHED_REPORTS = int(os.getenv("REPORT_MODEL_CACHE_SIZE", "32"))
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def try_parse_to_table(text):
+    if not text or not isinstance(text, str):
+        return None
+    cleaned = text.strip().replace("“", '"').replace("”", '"')
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, dict):
+            data = [data]
+        if isinstance(data, list) and all(isinstance(d, dict) for d in data):
+            headers = list(data[0].keys())
+            rows = [[d.get(h, "") for h in headers] for d in data]
+            return {"headers": headers, "rows": rows}
+    except Exception:
+        try:
+            data = ast.literal_eval(cleaned)
+            if isinstance(data, list) and all(isinstance(d, dict) for d in data):
+                headers = list(data[0].keys())
+                rows = [[d.get(h, "") for h in headers] for d in data]
+                return {"headers": headers, "rows": rows}
+        except Exception:
+            pass
+
+    lines = [line.strip("•*- ") for line in cleaned.splitlines() if "|" in line]
+    rows = [line.split("|")[:3] for line in lines if len(line.split("|")) >= 3]
+    if rows:
+        return {"headers": ["Characteristic", "Insight", "Recommendation"], "rows": rows}
+
+    for sep in [",", "\t"]:
+        lines = [line for line in cleaned.splitlines() if sep in line]
+        rows = [line.split(sep)[:3] for line in lines if len(line.split(sep)) >= 3]
+        if rows:
+            return {"headers": ["Characteristic", "Insight", "Recommendation"], "rows": rows}
+    return None
+
+
+class StructuredReport:
+    """
+    Backend that builds the section list the web views render: every heading starts a
+    section, paragraphs that look like tables become tables (same rules as parsing the
+    .docx), and empty sections are dropped.
+    """
+
+    def __init__(self):
+        self.sections = []
+        self._current = json.loads(json.dumps(INTRO_SECTION))
+
+    def _close_section(self):
+        if self._current["content"]:
+            self.sections.append(self._current)
+
+    def heading(self, text, level=1):
+        if level == 0:
+            # The document title is styled "Title", not "Heading": it stays body text
+            self.paragraph(text)
+            return
+        text = str(text).strip()
+        if not text:
+            return
+        self._close_section()
+        self._current = {"title": text, "content": []}
+
+    def paragraph(self, text):
+        text = str(text).strip()
+        if not text:
+            return
+        if text.startswith("⭐"):
+            self.heading(text)
+            return
+        table = try_parse_to_table(text)
+        if table:
+            self._current["content"].append({"type": "table", "headers": table["headers"], "rows": table["rows"]})
+        else:
+            self._current["content"].append({"type": "paragraph", "content": text})
+
+    def table(self, headers, columns, **options):
+        self._current["content"].append({
+            "type": "table",
+            "headers": [str(h).strip() for h in headers],
+            "rows": [[str(v).strip() for v in row] for row in zip(*columns)]
+        })
+
+    def picture(self, png, name=None):
+        # Heatmaps have their own page (/section/heatmaps), served from the saved PNGs
+        pass
+
+    def result(self):
+        return self.sections + ([self._current] if self._current["content"] else [])
+
+
+class DocxReport:
+    """Backend that writes the python-docx document."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def heading(self, text, level=1):
+        self.doc.add_heading(text, level)
+
+    def paragraph(self, text):
+        self.doc.add_paragraph(text)
+
+    def table(self, headers, columns, align=None):
+        from .docx_tables import add_bulk_table
+
+        return add_bulk_table(self.doc, headers, columns, align=align)
+
+    def picture(self, png, name=None):
+        import io
+        from docx.shared import Inches
+
+        self.doc.add_picture(io.BytesIO(png), width=Inches(6))
+
+
+class ReportWriter:
+    """Fans each heading / paragraph / table / picture out to every backend."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+
+    def heading(self, text, level=1):
+        for backend in self.backends:
+            backend.heading(text, level)
+
+    def paragraph(self, text):
+        for backend in self.backends:
+            backend.paragraph(text)
+
+    def table(self, headers, columns, **options):
+        """columns is column-major: one sequence of cell strings per header."""
+        for backend in self.backends:
+            backend.table(headers, columns, **options)
+
+    def picture(self, png, name=None):
+        for backend in self.backends:
+            backend.picture(png, name)
+
+
+def structured_path(report_path):
+    """The structured model of a report lives next to its .docx."""
+    return os.path.splitext(report_path)[0] + ".json"
+
+
+def save_structured_report(sections, report_path):
+    path = structured_path(report_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "sections": sections}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_structured_report(report_path, fallback=None):
+    """
+    Sections of a report, cached per (file, mtime). Reads the saved JSON model; for
+    reports generated before it existed, fallback(report_path) (e.g. parsing the
+    .docx) is used instead and cached the same way. Returns None if neither works.
+    """
+    json_path = structured_path(report_path)
+    source = json_path if os.path.exists(json_path) else report_path
+    try:
+        key = (os.path.abspath(source), os.stat(source).st_mtime_ns)
+    except OSError:
+        return None
+
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    if source == json_path:
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                sections = json.load(f)["sections"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not read report model {json_path}: {e}")
+            sections = fallback(report_path) if fallback else None
+    else:
+        sections = fallback(report_path) if fallback else None
+    if sections is None:
+        return None
+
+    with _cache_lock:
+        _cache[key] = sections
+        while len(_cache) > MAX_CACHED_REPORTS:
+            _cache.popitem(last=False)
+    return sections
@@ -0,0 +1,66 @@
+import os
+import hashlib
+import msgspec
+from . import services
+from .cache_store import DiskCache, CACHE_DIR
+
+# === SERP Cache Config ===
+SERP_CACHE_ENABLED = os.getenv("SERP_CACHE_ENABLED", "1") == "1"
+SERP_CACHE_PATH = os.getenv("SERP_CACHE_PATH", os.path.join(CACHE_DIR, "serp.sqlite"))
+SERP_CACHE_TTL = int(os.getenv("SERP_CACHE_TTL", str(24 * 3600)))
+SERP_CACHE_NEGATIVE_TTL = int(os.getenv("SERP_CACHE_NEGATIVE_TTL", str(3 * 3600)))  # no iframes / no ads
+SERP_CACHE_MAX_MB = int(os.getenv("SERP_CACHE_MAX_MB", "64"))
+
+
+class SerpResult(msgspec.Struct):
+    """Ad Preview outcome for one keyword: the iframe URLs and the ads scraped from each."""
+    iframe_urls: list
+    ads: list
+
+    @property
+    def empty(self):
+        return not any(self.ads)
+
+
+_decoder = msgspec.json.Decoder(SerpResult)
+
+
+services.register("serp_cache", lambda: DiskCache(SERP_CACHE_PATH, SERP_CACHE_TTL, SERP_CACHE_MAX_MB * 1024 * 1024))
+
+
+def _get_cache():
+    return services.get("serp_cache") if SERP_CACHE_ENABLED else None
+
+
+def serp_key(keyword, location, language, device):
+    # Keywords are case- and whitespace-insensitive in Ad Preview
+    parts = [" ".join(str(keyword).lower().split()), str(location).lower(), str(language).lower(), str(device).lower()]
+    return "serp:" + hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_serp(keyword, location, language, device):
+    """Cached SerpResult for the search, or None on a miss."""
+    cache = _get_cache()
+    if cache is None:
+        return None
+    raw = cache.get(serp_key(keyword, location, language, device))
+    if raw is None:
+        return None
+    try:
+        return _decoder.decode(raw)
+    except msgspec.DecodeError:
+        return None
+
+
+def set_serp(keyword, location, language, device, result):
+    """Store result; searches that found no ads are kept for SERP_CACHE_NEGATIVE_TTL only."""
+    cache = _get_cache()
+    if cache is None:
+        return
+    ttl = SERP_CACHE_NEGATIVE_TTL if result.empty else SERP_CACHE_TTL
+    cache.set(serp_key(keyword, location, language, device), msgspec.json.encode(result), ttl_seconds=ttl)
+
+
+def serp_cache_stats():
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,94 @@
+import os
+import threading
+
+# Lazy, process-local registry for heavy clients and datasets (Gemini model, Google Ads
+# client, Chrome debugger, ...). Factories run on first use, never at import time, and
+# every instance is dropped in a forked child so no gRPC channel or socket created
+# before a gunicorn fork is reused afterwards.
+
+_factories = {}
+_instances = {}
+_lock = threading.RLock()
+
+
+def register(name, factory):
+    """Register factory() as the builder for service name (replaces any previous one)."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get(name):
+    """Return the service instance, building it on first use in this process."""
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _instances:
+            try:
+                factory = _factories[name]
+            except KeyError:
+                raise KeyError(f"No service registered as {name!r}") from None
+            _instances[name] = factory()
+        return _instances[name]
+
+
+def is_initialized(name):
+    return name in _instances
+
+
+def reset(name=None):
+    """Forget one (or every) built instance; the next get() rebuilds it. Pools are shut down."""
+    with _lock:
+        names = list(_instances) if name is None else [name]
+        dropped = [_instances.pop(n) for n in names if n in _instances]
+    for instance in dropped:
+        shutdown = getattr(instance, "shutdown", None)
+        if callable(shutdown):
+            try:
+                shutdown(wait=False)
+            except Exception:
+                pass
+
+
+def _after_fork_in_child():
+    global _lock
+    _lock = threading.RLock()
+    _instances.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def spawn_pool(max_workers):
+    """
+    ProcessPoolExecutor for CPU-bound stages (chart rendering, HTML extraction). Workers
+    are spawned, not forked, so they never inherit the threads, sockets or gRPC state of
+    the web worker. Register it as a service so it is created on first use.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+class LazyService:
+    """
+    Module-level stand-in for a registered service: attribute access is forwarded to
+    get(name), so `from .config import model` stays cheap and the real object is built
+    by the first `model.generate_content(...)`.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, "_service_name", name)
+
+    def __getattr__(self, attr):
+        return getattr(get(self._service_name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(get(self._service_name), attr, value)
+
+    def __repr__(self):
+        state = "ready" if is_initialized(self._service_name) else "not built yet"
+        return f"<LazyService {self._service_name!r} ({state})>"
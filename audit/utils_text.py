@@ -161,3 +161,41 @@ def parse_and_repair(raw):
         return df.to_dict(orient="records")
 
     return []
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an the and or of to in on for with is are be it this that your you page".split())
+
+def _word_set(text):
+    return frozenset(w for w in _WORD_RE.findall(str(text or "").lower()) if w not in _STOPWORDS)
+
+def text_similarity(a, b):
+    """Jaccard similarity (0..1) of the content words of two strings (or of two _word_set results)."""
+    words_a = a if isinstance(a, frozenset) else _word_set(a)
+    words_b = b if isinstance(b, frozenset) else _word_set(b)
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+def dedupe_insight_rows(rows, threshold=0.6):
+    """
+    Merge near-duplicate Characteristic / Insight / Recommendation rows, e.g. the same
+    finding reported by several chunks of one page in slightly different words.
+    Two rows are duplicates when their Characteristic matches (case-insensitive) and
+    their Insight + Recommendation text has similarity >= threshold; the more
+    detailed (longer) row is kept, in the position of the first one seen.
+    """
+    kept = []
+    signatures = []
+    for row in rows:
+        characteristic = str(row.get("Characteristic", "")).strip().lower()
+        words = _word_set(f"{row.get('Insight', '')} {row.get('Recommendation', '')}")
+        for i, (kept_characteristic, kept_words) in enumerate(signatures):
+            if kept_characteristic == characteristic and text_similarity(words, kept_words) >= threshold:
+                if len(str(row.get("Insight", ""))) > len(str(kept[i].get("Insight", ""))):
+                    kept[i] = row
+                    signatures[i] = (characteristic, words)
+                break
+        else:
+            kept.append(row)
+            signatures.append((characteristic, words))
+    return kept
@@ -1,21 +1,36 @@
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urlunparse
 import pandas as pd
-from .config import GEO_LOOKUP_DF
+from .geo_index import get_geo_index
+from .http_fetch import fetch, fetch_many
+from .extract import extract_text, extract_many
 
-def fetch_page_text(url):
+def page_text(result):
+    """Main visible text of a fetched page (a result dict from audit.http_fetch), or "" on failure."""
+    if result["error"]:
+        print(f"❌ Failed to fetch page {result['url']}: {result['error']}")
+        return ""
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, "html.parser")
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        return soup.get_text(separator=" ", strip=True)
+        return extract_text(result["body"], result["encoding"])["text"]
     except Exception as e:
-        print(f"❌ Failed to fetch page {url}: {e}")
+        print(f"❌ Failed to parse page {result['url']}: {e}")
         return ""
 
+def fetch_page_text(url):
+    return page_text(fetch(url))
+
+def fetch_pages_text(urls):
+    """
+    Batch version of fetch_page_text: {url: text}. Pages are fetched concurrently over
+    pooled connections and their text is extracted in the extraction process pool.
+    """
+    results = fetch_many(urls)
+    for url, result in results.items():
+        if result["error"]:
+            print(f"❌ Failed to fetch page {url}: {result['error']}")
+    ok = {url: (r["body"], r["encoding"]) for url, r in results.items() if not r["error"]}
+    extracted = extract_many(ok)
+    return {url: extracted[url]["text"] if url in extracted else "" for url in results}
+
 def normalize_url(url):
     try:
         parsed = urlparse(url)
@@ -31,22 +46,12 @@ def extract_location_parts(canonical_name):
     parts += [""] * (3 - len(parts))
     return pd.Series({"City": parts[-3], "Region": parts[-2], "Country": parts[-1]})
 
-def resolve_geo_names_from_csv(geo_ids):
-    info = {}
-    for geo_id in geo_ids:
-        try:
-            row = GEO_LOOKUP_DF.loc[int(geo_id)]
-            info[int(geo_id)] = {
-                "name": row.get("Name", ""),
-                "canonical_name": row.get("Canonical Name", ""),
-                "type": row.get("Target Type", ""),
-                "country_code": row.get("Country Code", "")
-            }
-        except Exception:
-            info[int(geo_id)] = {
-                "name": f"GeoID {geo_id}",
-                "canonical_name": "",
-                "type": "",
-                "country_code": ""
-            }
-    return info
+def resolve_geo_frame(geo_ids):
+    """
+    Vectorized geo lookup: one row per ID (see GeoIndex.lookup). Unknown IDs are named
+    'GeoID <id>' and keep an empty canonical name and type (the table shows them blank).
+    """
+    frame = get_geo_index().lookup(geo_ids)
+    missing = ~frame["found"]
+    frame.loc[missing, "name"] = "GeoID " + frame.loc[missing, "criteria_id"].astype(str)
+    return frame
@@ -0,0 +1,108 @@
+"""
+HTML-to-text throughput over a corpus of saved pages: BeautifulSoup html.parser
+(the old fetch_page_text) vs. audit.extract on lxml, serially and in the
+extraction process pool.
+
+    python benchmarks/bench_extract.py [html_dir] [--pages N]
+
+Without html_dir a synthetic landing-page corpus (nav, cookie banner, scripts,
+main content, footer) is generated.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit import extract, services
+from audit.extract import extract_text, extract_many
+
+WORDS = ("conversion pricing plumbing emergency repair quote certified local team warranty "
+         "schedule service install upgrade trusted reviews fast same-day licensed").split()
+
+
+def sentence(rng, n=14):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def synthetic_page(i, rng):
+    nav = "".join(f'<li><a href="/p{j}">{rng.choice(WORDS)}</a></li>' for j in range(40))
+    sections = "".join(
+        f"<section><h2>{sentence(rng, 5)}</h2>" + "".join(f"<p>{sentence(rng)}</p>" for _ in range(8)) + "</section>"
+        for _ in range(rng.randint(6, 14))
+    )
+    scripts = "".join(f"<script>var x{j} = {'{'}a: {j}{'}'}; function f{j}() {{ return x{j}; }}</script>" for j in range(30))
+    return (
+        f"<!doctype html><html><head><title>Page {i}</title><style>body{{margin:0}}</style>{scripts}</head><body>"
+        f'<header class="site-header"><nav>{nav}</nav></header>'
+        f'<div id="cookie-banner">We use cookies. <button>Accept</button></div>'
+        f"<main><h1>{sentence(rng, 6)}</h1>{sections}<form><input name=q><button>Get a quote</button></form></main>"
+        f'<aside class="sidebar">{sentence(rng)}</aside>'
+        f'<footer class="footer">{"".join(f"<a>{w}</a>" for w in WORDS)} &copy; 2025</footer>'
+        f"{scripts}</body></html>"
+    ).encode("utf-8")
+
+
+def load_corpus(html_dir, limit):
+    pages = []
+    for name in sorted(os.listdir(html_dir)):
+        if name.lower().endswith((".html", ".htm")):
+            with open(os.path.join(html_dir, name), "rb") as f:
+                pages.append(f.read())
+        if len(pages) >= limit:
+            break
+    return pages
+
+
+def bs4_text(body):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(body.decode("utf-8", errors="replace"), "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    return soup.get_text(separator=" ", strip=True)
+
+
+def report(name, pages, elapsed, chars):
+    mb = sum(len(p) for p in pages) / 1e6
+    print(f"{name:<24} {len(pages) / elapsed:8.1f} pages/s  {mb / elapsed:7.1f} MB/s  {chars / len(pages):9.0f} chars/page")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("html_dir", nargs="?")
+    parser.add_argument("--pages", type=int, default=300)
+    args = parser.parse_args()
+
+    if args.html_dir:
+        pages = load_corpus(args.html_dir, args.pages)
+    else:
+        rng = random.Random(3)
+        pages = [synthetic_page(i, rng) for i in range(args.pages)]
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1e6:.1f} MB, "
+          f"{extract.EXTRACT_WORKERS} extraction workers")
+
+    start = time.perf_counter()
+    chars = sum(len(bs4_text(p)) for p in pages)
+    report("bs4 html.parser", pages, time.perf_counter() - start, chars)
+
+    start = time.perf_counter()
+    chars = sum(extract_text(p, main_content=False)["chars_out"] for p in pages)
+    report("lxml (all text)", pages, time.perf_counter() - start, chars)
+
+    start = time.perf_counter()
+    chars = sum(extract_text(p)["chars_out"] for p in pages)
+    report("lxml main content", pages, time.perf_counter() - start, chars)
+
+    batch = {i: (p, None) for i, p in enumerate(pages)}
+    extract_many(dict(list(batch.items())[:extract.EXTRACT_WORKERS]))  # start the pool workers
+    start = time.perf_counter()
+    results = extract_many(batch)
+    report("lxml main, process pool", pages, time.perf_counter() - start, sum(r["chars_out"] for r in results.values()))
+    services.reset("extract_pool")
+
+
+if __name__ == "__main__":
+    main()
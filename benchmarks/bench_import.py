@@ -0,0 +1,63 @@
+"""
+Cold-start cost of the web app and the audit pipeline: wall time of a fresh
+interpreter importing each module, plus the slowest imports it pulled in
+(from python -X importtime). Nothing here needs real credentials.
+
+    python benchmarks/bench_import.py [runs]
+"""
+import os
+import sys
+import time
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["app", "audit.config", "audit.main_runner"]
+HEAVY = ["grpc", "google.ads.googleads.client", "google.generativeai", "matplotlib", "seaborn", "playwright", "pychrome", "bs4"]
+
+
+def run_import(module, importtime=False):
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", probe]
+    env = dict(os.environ)
+    for name in ["GEMINI_API_KEY", "GOOGLE_ADS_DEVELOPER_TOKEN", "GOOGLE_ADS_CLIENT_ID", "GOOGLE_ADS_CLIENT_SECRET", "GOOGLE_ADS_REFRESH_TOKEN"]:
+        env.setdefault(name, "bench")  # placeholders: importing must not need real credentials
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return elapsed, proc.stdout.strip(), proc.stderr
+
+
+def slowest_imports(importtime_log, top=8):
+    """Slowest modules imported directly by the target (importtime indents nesting by 2)."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module in TARGETS:
+        run_import(module)  # warm the OS file cache
+        times = [run_import(module)[0] for _ in range(runs)]
+        _, loaded, log = run_import(module, importtime=True)
+        print(f"{module:<20} median {statistics.median(times) * 1000:7.1f} ms  "
+              f"(min {min(times) * 1000:.1f} ms over {runs} runs)")
+        print(f"{'':<20} heavy modules loaded: {loaded or 'none'}")
+        for cumulative_us, name in slowest_imports(log):
+            print(f"{'':<20}   {cumulative_us / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Rows/sec for turning search_stream keyword rows into the report DataFrame:
+the old per-row dict loop vs. the fetchers' chunked column buffers and collector, decoding either
+proto-plus wrappers or the raw protobuf rows underneath them.
+
+    python benchmarks/bench_ingest.py [rows]
+"""
+import os
+import sys
+import time
+import random
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.ads.googleads.v20.services.types.google_ads_service import GoogleAdsRow
+from audit.ingest import iter_column_chunks, raw_message, micros_to_currency, safe_ratio, map_codes
+from audit.aggregate import ColumnCollector
+from audit.fetch_keywords import KEYWORD_SCHEMA
+from audit.config import MATCH_TYPE_MAP
+
+
+def make_rows(n):
+    rng = random.Random(42)
+    rows = []
+    for i in range(n):
+        row = GoogleAdsRow()
+        row.ad_group.name = f"Ad Group {i % 50}"
+        row.ad_group_criterion.keyword.text = f"keyword {i}"
+        row.ad_group_criterion.keyword.match_type = rng.choice([2, 3, 4])
+        row.ad_group_criterion.quality_info.quality_score = rng.randint(1, 10)
+        row.metrics.impressions = rng.randint(1, 10000)
+        row.metrics.clicks = rng.randint(0, 500)
+        row.metrics.average_cpc = rng.randint(0, 5_000_000)
+        row.metrics.cost_micros = rng.randint(0, 100_000_000)
+        row.metrics.conversions = rng.choice([0.0, 0.0, 1.0, 2.5, 7.0])
+        rows.append(row)
+    return rows
+
+
+def legacy(rows):
+    data = []
+    for row in rows:
+        cost = (row.metrics.cost_micros or 0) / 1e6
+        clicks = row.metrics.clicks or 0
+        impressions = row.metrics.impressions or 0
+        conversions = row.metrics.conversions or 0
+        cpa = cost / conversions if conversions else 0
+        data.append({
+            "Ad Group": row.ad_group.name,
+            "Keyword": row.ad_group_criterion.keyword.text,
+            "Match Type": MATCH_TYPE_MAP.get(row.ad_group_criterion.keyword.match_type, "UNKNOWN"),
+            "Quality Score": row.ad_group_criterion.quality_info.quality_score,
+            "Impressions": impressions,
+            "Clicks": clicks,
+            "CTR": clicks / impressions if impressions else 0,
+            "Avg CPC": (row.metrics.average_cpc or 0) / 1e6,
+            "Cost ($)": cost,
+            "Conversions": conversions,
+            "CPA ($)": cpa,
+            "CVR": conversions / clicks if clicks else 0
+        })
+    return pd.DataFrame(data)
+
+
+def columnar(rows):
+    # The fetchers' path: chunked column buffers fed to an accumulator
+    collector = ColumnCollector(KEYWORD_SCHEMA)
+    for chunk in iter_column_chunks(rows, KEYWORD_SCHEMA):
+        collector.add(chunk)
+    cols = collector.result()
+    cost = micros_to_currency(cols["metrics.cost_micros"])
+    clicks = cols["metrics.clicks"]
+    impressions = cols["metrics.impressions"]
+    conversions = cols["metrics.conversions"]
+    return pd.DataFrame({
+        "Ad Group": cols["ad_group.name"],
+        "Keyword": cols["ad_group_criterion.keyword.text"],
+        "Match Type": map_codes(cols["ad_group_criterion.keyword.match_type"], MATCH_TYPE_MAP),
+        "Quality Score": cols["ad_group_criterion.quality_info.quality_score"],
+        "Impressions": impressions,
+        "Clicks": clicks,
+        "CTR": safe_ratio(clicks, impressions),
+        "Avg CPC": micros_to_currency(cols["metrics.average_cpc"]),
+        "Cost ($)": cost,
+        "Conversions": conversions,
+        "CPA ($)": safe_ratio(cost, conversions),
+        "CVR": safe_ratio(conversions, clicks)
+    })
+
+
+def bench(label, fn, rows, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<10} {len(rows) / best:>12,.0f} rows/sec  ({best * 1000:.1f} ms)")
+    return df
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = make_rows(n)
+    print(f"Keyword rows: {n:,}")
+    old = bench("legacy", legacy, rows)
+    new = bench("columnar", columnar, rows)
+    raw = bench("raw", columnar, [raw_message(r) for r in rows])
+    pd.testing.assert_frame_equal(old, new, check_dtype=False)
+    pd.testing.assert_frame_equal(old, raw, check_dtype=False)
+    print("✅ DataFrames match")
+
+
+if __name__ == "__main__":
+    main()
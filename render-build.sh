@@ -13,4 +13,7 @@ chromium --version || { echo "❌ Chromium install failed"; exit 1; }
 pip install --upgrade pip
 pip install -r requirements.txt || { echo "❌ pip install failed"; exit 1; }
 
+# === Prebuild the memory-mapped geo index (otherwise built on first use) ===
+python -m audit.geo_index || echo "⚠️ Geo index not prebuilt; it will be built on first use"
+
 echo "✅ Build completed successfully"
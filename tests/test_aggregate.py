@@ -0,0 +1,57 @@
+import numpy as np
+import msgspec
+
+from audit.aggregate import GroupSum
+from audit.ingest import ColumnBuffer
+
+
+def test_column_buffer_grows_past_its_chunk_and_drains():
+    buffer = ColumnBuffer("int64", chunk_size=4)
+    for i in range(10):
+        buffer.append(i)
+        if i % 3 == 0:
+            buffer.flush()
+
+    assert len(buffer) == 10
+    assert buffer.values().tolist() == list(range(10))
+    assert buffer.drain().sum() == 45
+    assert len(buffer) == 0
+
+    buffer.append(7)
+    assert buffer.values().tolist() == [7]
+
+
+def test_group_sum_matches_groupby_across_chunks():
+    accumulator = GroupSum("url", ["clicks", "cost"], key_fn=str.lower)
+    accumulator.add({"url": np.array(["A", "b", "a"], dtype=object),
+                     "clicks": np.array([1, 2, 3]), "cost": np.array([0.5, 1.0, 1.5])})
+    accumulator.add({"url": np.array(["B", "c"], dtype=object),
+                     "clicks": np.array([4, 5]), "cost": np.array([2.0, 2.5])})
+
+    sums = accumulator.result()
+    by_key = {k: (c, m) for k, c, m in zip(sums["url"], sums["clicks"], sums["cost"])}
+    assert by_key == {"a": (4.0, 2.0), "b": (6.0, 3.0), "c": (5.0, 2.5)}
+    assert accumulator.rows_seen == 5
+
+
+def test_group_sum_keeps_rows_with_missing_keys():
+    accumulator = GroupSum("url", ["clicks"])
+    for _ in range(2):
+        accumulator.add({"url": np.array(["a", None, np.nan], dtype=object), "clicks": np.array([1, 2, 3])})
+
+    sums = accumulator.result()
+    assert dict(zip(sums["url"], sums["clicks"])) == {"a": 2.0, None: 10.0}
+    assert sums["clicks"].sum() == 12.0
+
+
+def test_group_sum_round_trips_through_dump():
+    accumulator = GroupSum("geo", ["clicks"])
+    accumulator.add({"geo": np.array([1, 2, 1]), "clicks": np.array([1, 2, 3])})
+
+    restored = GroupSum("geo", ["clicks"])
+    restored.load(msgspec.msgpack.decode(msgspec.msgpack.encode(accumulator.dump())))
+    restored.add({"geo": np.array([2]), "clicks": np.array([10])})
+
+    sums = restored.result()
+    assert dict(zip(sums["geo"], sums["clicks"])) == {1: 4.0, 2: 12.0}
+    assert restored.rows_seen == 4
@@ -0,0 +1,45 @@
+import time
+
+from audit.cache_store import DiskCache
+
+
+def _total(cache):
+    return cache._connect().execute("SELECT bytes FROM totals WHERE id = 0").fetchone()[0]
+
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, max_bytes=1024)
+    cache.set("fresh", b"1")
+    cache.set("stale", b"2", ttl_seconds=-1)
+
+    assert cache.get("fresh") == b"1"
+    assert cache.get("stale") is None
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, max_bytes=25)
+    cache.set("a", b"x" * 10)
+    time.sleep(0.01)
+    cache.set("b", b"x" * 10)
+    time.sleep(0.01)
+    cache.get("a")  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.set("c", b"x" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert _total(cache) == cache.stats()["bytes"] == 20
+
+
+def test_running_total_follows_replacements_and_deletes(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = DiskCache(path, ttl_seconds=60, max_bytes=1024)
+    cache.set("a", b"x" * 10)
+    cache.set("a", b"x" * 3)
+    cache.set("b", b"x" * 5)
+    cache.delete("b")
+
+    assert _total(cache) == cache.stats()["bytes"] == 3
+    assert _total(DiskCache(path, ttl_seconds=60, max_bytes=1024)) == 3  # reopening keeps the total
@@ -0,0 +1,32 @@
+from audit.extract import extract_text
+
+PAGE = """
+<html><body>
+  <nav class="navbar"><a href="/">Home</a> <a href="/pricing">Pricing</a></nav>
+  <div class="cookie-banner">We use cookies</div>
+  <div class="hero-banner">
+    <h1>Save 50% on dental implants</h1>
+    <a class="btn" href="#form">Book your free consult</a>
+  </div>
+  <section class="section-header"><h2>Why patients choose us</h2></section>
+  <p>Board-certified surgeons and same-day appointments.</p>
+  <footer>© Example Dental</footer>
+</body></html>
+"""
+
+
+def test_hero_and_cta_outside_main_are_kept():
+    text = extract_text(PAGE)["text"]
+
+    assert "Save 50% on dental implants" in text
+    assert "Book your free consult" in text
+    assert "Why patients choose us" in text
+    assert "Board-certified surgeons" in text
+
+
+def test_exact_chrome_names_and_tags_are_dropped():
+    text = extract_text(PAGE)["text"]
+
+    assert "Pricing" not in text
+    assert "We use cookies" not in text
+    assert "Example Dental" not in text
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from audit import geo_index, utils_web
+
+
+@pytest.fixture
+def geo_csv_index(tmp_path, monkeypatch):
+    csv_path = tmp_path / "geotargets.csv"
+    pd.DataFrame([
+        {"Criteria ID": "1023191", "Name": "New York", "Canonical Name": "New York,New York,United States",
+         "Parent ID": "21167", "Country Code": "US", "Target Type": "City", "Status": "Active"},
+    ]).to_csv(csv_path, index=False)
+    index_dir = geo_index.build_geo_index(str(csv_path), str(tmp_path / "geo_index"))
+    monkeypatch.setattr(geo_index, "_index", geo_index.GeoIndex(index_dir))
+
+
+def test_unknown_geo_id_is_named_by_id(geo_csv_index):
+    frame = utils_web.resolve_geo_frame([1023191, 999])
+    known, unknown = frame.iloc[0], frame.iloc[1]
+
+    assert known["found"] and known["name"] == "New York" and known["target_type"] == "City"
+    assert not unknown["found"]
+    assert unknown["name"] == "GeoID 999"
+    assert unknown["canonical_name"] == ""
+    assert unknown["target_type"] == ""
+    assert utils_web.extract_location_parts(unknown["canonical_name"]).tolist() == ["", "", ""]
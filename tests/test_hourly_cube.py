@@ -0,0 +1,44 @@
+import numpy as np
+
+from audit.aggregate import HourlyAccumulator
+from audit.hourly_cube import HourlyCube
+
+
+def _cube(rows):
+    """HourlyCube from (day code, hour, clicks, conversions, cost_micros) rows."""
+    accumulator = HourlyAccumulator("day", "hour", ["clicks", "conversions", "cost"])
+    columns = np.array(rows, dtype=np.float64).T
+    accumulator.add({"day": columns[0], "hour": columns[1], "clicks": columns[2],
+                     "conversions": columns[3], "cost": columns[4]})
+    return HourlyCube.from_accumulator(accumulator.result())
+
+
+def test_ratios_are_recomputed_from_cell_sums():
+    # Two rows in Monday 9:00 (CVR 50% and 0%): the cell's CVR is 1 / 4, not their mean
+    cube = _cube([
+        (2, 9, 2, 1, 3_000_000),
+        (2, 9, 2, 0, 1_000_000),
+        (8, 23, 5, 0, 2_500_000),  # Sunday 23:00, clicks but no conversions
+        (9, 5, 100, 100, 1),       # not a day of week: ignored
+    ])
+
+    assert cube.metric("Clicks")[0, 9] == 4
+    assert cube.metric("Cost ($)")[0, 9] == 4.0
+    assert cube.metric("CVR")[0, 9] == 0.25
+    assert cube.metric("CPA ($)")[0, 9] == 4.0
+    assert cube.metric("CVR")[6, 23] == 0.0
+    assert cube.metric("CPA ($)")[6, 23] == 0.0
+    assert cube.metric("Clicks").sum() == 9
+
+
+def test_grid_and_cells_only_cover_clicked_days_and_hours():
+    cube = _cube([(2, 9, 4, 1, 4_000_000), (8, 23, 5, 0, 2_500_000)])
+
+    grid = cube.grid("CVR")
+    assert grid.index.tolist() == ["Monday", "Sunday"]
+    assert grid.columns.tolist() == [9, 23]
+    assert grid.loc["Monday", 9] == 0.25
+
+    cells = cube.cells()
+    assert cells[["Day", "Hour", "Clicks"]].values.tolist() == [["Monday", 9, 4], ["Sunday", 23, 5]]
+    assert not cube.empty and HourlyCube.empty_cube().empty
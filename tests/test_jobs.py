@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+
+import pytest
+
+from audit import jobs
+
+
+@pytest.fixture
+def job_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(jobs, "KEYS_DIR", str(tmp_path / "jobs" / "keys"))
+    monkeypatch.setattr(jobs, "_jobs", {})
+    return tmp_path
+
+
+def _wait(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get_job(job_id)
+        if job["status"] in (jobs.DONE, jobs.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_audit_key_identifies_the_request():
+    window = ("2026-09-17", "2026-10-16")
+    key = jobs.audit_key("123", "456", window, {"a": 1, "b": 2})
+
+    assert key == jobs.audit_key(123, "456", list(window), {"b": 2, "a": 1})
+    assert key != jobs.audit_key("123", None, window, {"a": 1, "b": 2})
+    assert key != jobs.audit_key("123", "456", ("2026-09-18", "2026-10-17"), {"a": 1, "b": 2})
+
+
+def test_identical_submissions_share_one_job(job_dirs):
+    release = threading.Event()
+    calls = []
+
+    def work(name):
+        calls.append(name)
+        release.wait(5)
+        path = job_dirs / f"{name}.docx"
+        path.write_bytes(b"report")
+        return str(path)
+
+    first = jobs.submit_job(work, "first", key="k1", owner="a@x")
+    again = jobs.submit_job(work, "again", key="k1", owner="a@x")
+    other = jobs.submit_job(work, "other", key="k2", owner="a@x")
+    release.set()
+
+    assert again["id"] == first["id"]
+    assert other["id"] != first["id"]
+    assert _wait(first["id"])["status"] == jobs.DONE
+    _wait(other["id"])
+    # Finished within AUDIT_FRESHNESS with its report on disk: still reused
+    assert jobs.submit_job(work, "later", key="k1", owner="a@x")["id"] == first["id"]
+    assert sorted(calls) == ["first", "other"]
+
+
+def test_finished_job_is_not_reused_once_its_report_is_gone(job_dirs):
+    def work():
+        path = job_dirs / "report.docx"
+        path.write_bytes(b"report")
+        return str(path)
+
+    first = _wait(jobs.submit_job(work, key="k1")["id"])
+    os.remove(first["result"])
+
+    assert jobs.submit_job(work, key="k1")["id"] != first["id"]
+
+
+def test_other_owners_job_is_shared_only_if_allowed(job_dirs):
+    release = threading.Event()
+    first = jobs.submit_job(release.wait, 5, key="k1", owner="a@x")
+    try:
+        denied = jobs.submit_job(release.wait, 5, key="k1", owner="b@x", can_share=lambda: False)
+        allowed = jobs.submit_job(release.wait, 5, key="k1", owner="c@x", can_share=lambda: True)
+    finally:
+        release.set()
+
+    assert denied["id"] != first["id"]
+    assert allowed["id"] == denied["id"]  # the key now points at b's job
+    _wait(first["id"])
+    _wait(denied["id"])